@@ -1,8 +1,10 @@
 import streamlit as st
 import uuid
 import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from typing import Optional
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Configure Streamlit page
 st.set_page_config(
@@ -13,7 +15,7 @@ st.set_page_config(
 )
 
 # Import modules
-from config import research_config
+from config import ResearchConfig, research_config
 from research import create_research_graph, ResearchState, ResearchSession
 from storage import create_vector_store
 from components import (
@@ -23,11 +25,17 @@ from components import (
     render_configuration_sidebar,
     render_research_history_sidebar,
     render_system_status_sidebar,
-    render_help_sidebar
+    render_help_sidebar,
+    vector_store_key,
+    store_key,
+    cached_recent_sessions,
+    cached_stats,
+    cached_search_similar,
+    clear_vector_store_cache
 )
 
 # Custom CSS for beautiful UI
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     .main-header {
         text-align: center;
@@ -99,33 +107,129 @@ st.markdown("""
         box-shadow: 0 0 0 0.2rem rgba(31, 119, 180, 0.25);
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+MAIN_HEADER_HTML = """
+    <div class="main-header">
+        <h1>🔬 Deep Research Platform</h1>
+        <p>AI-Powered Research with Local LLMs</p>
+    </div>
+"""
+
+# Streamlit drops elements that are not re-emitted on a rerun, so the styles
+# are injected every run from the prebuilt constant rather than only once.
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
+# Default values for Streamlit session state
+SESSION_DEFAULTS = {
+    'research_state': None,
+    'research_config': research_config,
+    'research_running': False,
+    'selected_session': None,
+    'research_results': None,
+    'research_error': None,
+    'research_future': None,
+    'research_cancel_event': None,
+    'research_outcome': None,
+    'last_searched_topic': None,
+    'research_attempt': None,
+    'similar_sessions': [],
+    'recent_cards_key': None,
+    'recent_cards_html': "",
+}
+
+# Research history database shared by every session of the app
+VECTOR_STORE_PATH = "research_history.db"
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _get_vector_store(db_path: str, embedding_model: str, embedding_backend: str, embedding_dimension: int):
+    """Get the shared vector store for an embedding setup, creating it on first use."""
+    config = ResearchConfig(
+        embedding_model=embedding_model,
+        embedding_backend=embedding_backend,
+        embedding_dimension=embedding_dimension
+    )
+    return create_vector_store(config, db_path)
+
+def get_vector_store(config: ResearchConfig):
+    """Get the vector store for a config, keyed only on the settings the store uses.
+    
+    LLM and search settings do not affect the store, so changing them keeps the
+    same instance instead of opening another writer on the same database.
+    """
+    # Same identity as the store_key of the cached reads
+    return _get_vector_store(*vector_store_key(VECTOR_STORE_PATH, config))
 
 def initialize_session_state():
     """Initialize Streamlit session state variables."""
-    if 'research_state' not in st.session_state:
-        st.session_state.research_state = None
-    
-    if 'research_config' not in st.session_state:
-        st.session_state.research_config = research_config
+    for key, value in SESSION_DEFAULTS.items():
+        st.session_state.setdefault(key, value)
     
     if 'vector_store' not in st.session_state:
-        st.session_state.vector_store = create_vector_store(research_config)
-    
-    if 'research_running' not in st.session_state:
-        st.session_state.research_running = False
-    
-    if 'selected_session' not in st.session_state:
-        st.session_state.selected_session = None
-    
-    if 'progress_placeholder' not in st.session_state:
-        st.session_state.progress_placeholder = None
-    
-    if 'research_results' not in st.session_state:
-        st.session_state.research_results = None
-    
-    if 'research_error' not in st.session_state:
-        st.session_state.research_error = None
+        st.session_state.vector_store = get_vector_store(st.session_state.research_config)
+
+def render_session_card(index: int, session: ResearchSession) -> str:
+    """Build the HTML card for a recent research session."""
+    return f"""
+        <div class="research-card">
+            <h4>📄 {index}. {session.topic[:40]}...</h4>
+            <p><small>📅 {session.created_at.strftime('%Y-%m-%d %H:%M')}</small></p>
+            <p><small>📊 {len(session.sources)} sources</small></p>
+        </div>
+    """
+
+def find_similar_sessions(topic: str):
+    """Search similar sessions for a committed topic, reusing the last result."""
+    # The text area only reruns the script once its value is committed, so
+    # every change is searched right away; the cached search dedups repeats
+    if topic != st.session_state.last_searched_topic:
+        vector_store = st.session_state.vector_store
+        st.session_state.similar_sessions = cached_search_similar(
+            vector_store, store_key(vector_store), topic, limit=3, threshold=0.5
+        )
+        st.session_state.last_searched_topic = topic
+    return st.session_state.similar_sessions
+
+# Seconds between progress panel redraws while research is running
+PROGRESS_REFRESH_INTERVAL = 1.0
+
+def render_research_progress(state: Optional[ResearchState]):
+    """Render the research progress panel."""
+    if state:
+        st.markdown("---")
+        st.markdown("### 📊 Research Progress")
+        
+        # Stable container at a fixed script position so reruns patch it in place
+        progress_container = st.container()
+        
+        with progress_container:
+            display_research_progress(state)
+            display_step_details(state)
+
+def render_research_metrics(state: Optional[ResearchState]):
+    """Render the research metrics panel."""
+    if state:
+        st.markdown("### 📈 Research Metrics")
+        display_research_metrics(state)
+
+def _rerun_when_research_done():
+    """Rerun the whole app once the background research finishes, so main() collects it."""
+    future = st.session_state.research_future
+    if future is None or future.done():
+        st.rerun()
+
+# While research runs, these fragments redraw only their own panel on a timer,
+# so the script thread never sleeps and widget clicks are handled immediately
+@st.fragment(run_every=PROGRESS_REFRESH_INTERVAL)
+def live_research_progress():
+    """Redraw the progress panel until the background research finishes."""
+    _rerun_when_research_done()
+    render_research_progress(st.session_state.research_state)
+
+@st.fragment(run_every=PROGRESS_REFRESH_INTERVAL)
+def live_research_metrics():
+    """Redraw the metrics panel until the background research finishes."""
+    render_research_metrics(st.session_state.research_state)
 
 def progress_callback(state: ResearchState):
     """Callback function for research progress updates."""
@@ -135,13 +239,65 @@ def progress_callback(state: ResearchState):
     except Exception as e:
         print(f"Progress callback error: {e}")
 
-def run_research_sync(topic: str):
-    """Run research synchronously in the main thread."""
+# The script module is re-executed on every rerun, so the pools live in the
+# resource cache to be shared by all reruns and sessions of the process
+@st.cache_resource(show_spinner=False)
+def get_research_executor() -> ThreadPoolExecutor:
+    """Pool that runs research off the script thread so reruns can render progress."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="research")
+
+@st.cache_resource(show_spinner=False)
+def get_persist_executor() -> ThreadPoolExecutor:
+    """Single worker that embeds and writes finished sessions, one at a time."""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="persist")
+
+def _on_session_persisted(future: Future):
+    """Log vector store write failures and refresh cached history reads."""
+    try:
+        if not future.result():
+            print("Error saving to vector store: session was not stored")
+    except Exception as ve:
+        print(f"Error saving to vector store: {ve}")
+    clear_vector_store_cache()
+
+# Times a failed or stopped run is resumed from its checkpoints before starting over
+MAX_RESUME_ATTEMPTS = 1
+
+def checkpoint_thread_for(topic: str) -> str:
+    """Reuse the last unfinished attempt's checkpoint thread when retrying it, else start a new one."""
+    key = (topic, st.session_state.research_config.model_dump_json())
+    attempt = st.session_state.research_attempt
+    if attempt and attempt["key"] == key and attempt["resumes"] < MAX_RESUME_ATTEMPTS:
+        attempt["resumes"] += 1
+        return attempt["thread_id"]
+    
+    thread_id = uuid.uuid4().hex
+    st.session_state.research_attempt = {"key": key, "thread_id": thread_id, "resumes": 0}
+    return thread_id
+
+def start_research_job(topic: str) -> Future:
+    """Submit research to the background executor and return its future."""
+    ctx = get_script_run_ctx()
+    cancel_event = threading.Event()
+    st.session_state.research_cancel_event = cancel_event
+    thread_id = checkpoint_thread_for(topic)
+    
+    def worker():
+        # Attach the script context so the worker can update st.session_state
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return run_research_sync(topic, cancel_event, thread_id)
+    
+    return get_research_executor().submit(worker)
+
+def run_research_sync(topic: str, cancel_event: Optional[threading.Event] = None,
+                      thread_id: Optional[str] = None):
+    """Run research synchronously in the calling thread."""
     try:
         # Create research graph
         research_graph = create_research_graph(
             st.session_state.research_config,
-            progress_callback=progress_callback
+            progress_callback=progress_callback,
+            cancel_event=cancel_event
         )
         
         # Initialize research state
@@ -153,7 +309,10 @@ def run_research_sync(topic: str):
         st.session_state.research_state = research_state
         
         # Run the research
-        final_state = research_graph.run_research(topic)
+        final_state = research_graph.run_research(topic, thread_id)
+        
+        # Finished attempts are not resumed
+        st.session_state.research_attempt = None
         
         # Update final state
         st.session_state.research_state = final_state
@@ -170,12 +329,10 @@ def run_research_sync(topic: str):
                 config=st.session_state.research_config.model_dump()
             )
             
-            # Save to vector store
-            try:
-                st.session_state.vector_store.add_session(session)
-                st.session_state.research_results = session
-            except Exception as ve:
-                print(f"Error saving to vector store: {ve}")
+            # Save to vector store in the background; caches refresh once it lands
+            future = get_persist_executor().submit(st.session_state.vector_store.add_session, session)
+            future.add_done_callback(_on_session_persisted)
+            st.session_state.research_results = session
         
         st.session_state.research_running = False
         return final_state
@@ -194,26 +351,32 @@ def main():
     # Initialize session state
     initialize_session_state()
     
+    # Collect finished background research
+    future = st.session_state.research_future
+    if future is not None and future.done():
+        st.session_state.research_future = None
+        st.session_state.research_running = False
+        st.session_state.research_outcome = "success" if future.result() else "error"
+    
     # Header
-    st.markdown("""
-        <div class="main-header">
-            <h1>🔬 Deep Research Platform</h1>
-            <p>AI-Powered Research with Local LLMs</p>
-        </div>
-    """, unsafe_allow_html=True)
+    st.markdown(MAIN_HEADER_HTML, unsafe_allow_html=True)
     
     # Sidebar configuration
-    updated_config = render_configuration_sidebar(st.session_state.research_config)
+    # Sidebar sections run as fragments, so they must be called inside st.sidebar
+    with st.sidebar:
+        render_configuration_sidebar(st.session_state.research_config)
+    updated_config = st.session_state.sidebar_config
     
     # Update config if changed
     if updated_config != st.session_state.research_config:
         st.session_state.research_config = updated_config
-        # Recreate vector store with new config
-        st.session_state.vector_store = create_vector_store(updated_config)
+        # Only embedding changes select a different vector store
+        st.session_state.vector_store = get_vector_store(updated_config)
     
     # Render sidebar components
-    render_research_history_sidebar(st.session_state.vector_store)
-    render_system_status_sidebar(st.session_state.vector_store)
+    with st.sidebar:
+        render_research_history_sidebar(st.session_state.vector_store)
+        render_system_status_sidebar(st.session_state.vector_store)
     render_help_sidebar()
     
     # Main content area
@@ -262,25 +425,30 @@ def main():
             col_btn1, col_btn2, col_btn3 = st.columns([1, 1, 2])
             
             with col_btn1:
+                # Stays disabled until the worker has actually finished, even after Stop
                 start_research = st.button(
                     "🚀 Start Research",
-                    disabled=not research_topic or st.session_state.research_running,
+                    disabled=(not research_topic or st.session_state.research_running
+                              or st.session_state.research_future is not None),
                     type="primary"
                 )
             
             with col_btn2:
                 if st.session_state.research_running:
-                    if st.button("⏹️ Stop Research"):
-                        st.session_state.research_running = False
+                    cancel_event = st.session_state.research_cancel_event
+                    stopping = cancel_event is not None and cancel_event.is_set()
+                    if st.button("⏳ Stopping..." if stopping else "⏹️ Stop Research", disabled=stopping):
+                        # The worker stops at its next step; the run is collected once its future is done
+                        if cancel_event:
+                            cancel_event.set()
                         if st.session_state.research_state:
                             st.session_state.research_state.mark_error("Research stopped by user")
+                        st.rerun()
             
             with col_btn3:
                 if research_topic:
                     # Search for similar research
-                    similar_sessions = st.session_state.vector_store.search_similar(
-                        research_topic, limit=3, threshold=0.5
-                    )
+                    similar_sessions = find_similar_sessions(research_topic)
                     
                     if similar_sessions:
                         st.info(f"💡 Found {len(similar_sessions)} similar research sessions")
@@ -289,33 +457,23 @@ def main():
             if start_research and research_topic:
                 st.session_state.research_running = True
                 st.session_state.research_error = None
+                st.session_state.research_outcome = None
                 
-                with st.spinner("🔍 Starting research..."):
-                    # Run research synchronously
-                    final_state = run_research_sync(research_topic)
-                    
-                    if final_state:
-                        st.success("✅ Research completed successfully!")
-                    else:
-                        st.error(f"❌ Research failed: {st.session_state.research_error}")
-                
+                # Run research in the background and poll it from the refresh loop
+                st.session_state.research_future = start_research_job(research_topic)
                 st.rerun()
-        
-        # Progress display
-        if st.session_state.research_state:
-            st.markdown("---")
-            st.markdown("### 📊 Research Progress")
             
-            # Create progress placeholder
-            st.session_state.progress_placeholder = st.empty()
-            
-            with st.session_state.progress_placeholder.container():
-                display_research_progress(st.session_state.research_state)
-                display_step_details(st.session_state.research_state)
-            
-            # Auto-refresh during research
-            if st.session_state.research_running:
-                st.rerun()
+            # Report the outcome of the last finished research
+            if st.session_state.research_outcome == "success":
+                st.success("✅ Research completed successfully!")
+            elif st.session_state.research_outcome == "error":
+                st.error(f"❌ Research failed: {st.session_state.research_error}")
+        
+        # Progress display, redrawn by a fragment while the research is running
+        if st.session_state.research_future is not None:
+            live_research_progress()
+        else:
+            render_research_progress(st.session_state.research_state)
         
         # Results display
         if (st.session_state.research_state and 
@@ -356,30 +514,37 @@ def main():
                 if st.button("🔄 Start New Research"):
                     st.session_state.research_state = None
                     st.session_state.research_running = False
+                    st.session_state.research_outcome = None
                     st.rerun()
     
     with col2:
         # Metrics and status
-        if st.session_state.research_state:
-            st.markdown("### 📈 Research Metrics")
-            display_research_metrics(st.session_state.research_state)
+        if st.session_state.research_future is not None:
+            live_research_metrics()
+        else:
+            render_research_metrics(st.session_state.research_state)
         
         # Recent research sessions
         st.markdown("### 📚 Recent Research")
-        recent_sessions = st.session_state.vector_store.get_recent_sessions(limit=3)
+        vector_store = st.session_state.vector_store
+        recent_sessions = cached_recent_sessions(vector_store, store_key(vector_store), limit=3)
         
         if recent_sessions:
-            for session in recent_sessions:
-                with st.container():
-                    st.markdown(f"""
-                        <div class="research-card">
-                            <h4>📄 {session.topic[:40]}...</h4>
-                            <p><small>📅 {session.created_at.strftime('%Y-%m-%d %H:%M')}</small></p>
-                            <p><small>📊 {len(session.sources)} sources</small></p>
-                        </div>
-                    """, unsafe_allow_html=True)
-                    
-                    if st.button(f"View Details", key=f"view_{session.id}"):
+            # Render all cards as one markdown block, reusing the HTML while
+            # the listed sessions are unchanged
+            cards_key = tuple((session.id, session.topic) for session in recent_sessions)
+            if st.session_state.recent_cards_key != cards_key:
+                st.session_state.recent_cards_html = "\n".join(
+                    render_session_card(i, session) for i, session in enumerate(recent_sessions, 1)
+                )
+                st.session_state.recent_cards_key = cards_key
+            st.markdown(st.session_state.recent_cards_html, unsafe_allow_html=True)
+            
+            # Buttons need widget state, so they are rendered in a single row below the cards
+            button_cols = st.columns(len(recent_sessions))
+            for i, (col, session) in enumerate(zip(button_cols, recent_sessions), 1):
+                with col:
+                    if st.button(f"View {i}", key=f"view_{session.id}"):
                         st.session_state.selected_session = session
                         st.rerun()
         else:
@@ -387,7 +552,7 @@ def main():
         
         # System stats
         st.markdown("### 📊 System Statistics")
-        stats = st.session_state.vector_store.get_stats()
+        stats = cached_stats(vector_store, store_key(vector_store))
         
         if stats:
             st.metric("Total Research Sessions", stats.get("total_sessions", 0))
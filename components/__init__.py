@@ -1,29 +1,39 @@
 """Streamlit components for the Deep Research Platform."""
 
-from .progress_display import (
-    display_research_progress,
-    display_step_details,
-    display_live_research_feed,
-    display_research_metrics
-)
-from .sidebar import (
-    render_configuration_sidebar,
-    render_research_history_sidebar,
-    render_system_status_sidebar,
-    render_help_sidebar
-)
+import importlib
 
-__all__ = [
-    "display_research_progress",
-    "display_step_details", 
-    "display_live_research_feed",
-    "display_research_metrics",
-    "render_configuration_sidebar",
-    "render_research_history_sidebar",
-    "render_system_status_sidebar",
-    "render_help_sidebar"
-]
+# Public names mapped to the submodule that defines them; submodules are
+# imported on first attribute access (PEP 562) rather than at package import.
+_EXPORTS = {
+    "display_research_progress": "progress_display",
+    "display_step_details": "progress_display",
+    "display_live_research_feed": "progress_display",
+    "display_research_metrics": "progress_display",
+    "render_configuration_sidebar": "sidebar",
+    "render_research_history_sidebar": "sidebar",
+    "render_system_status_sidebar": "sidebar",
+    "render_help_sidebar": "sidebar",
+    "vector_store_key": "store_cache",
+    "store_key": "store_cache",
+    "cached_recent_sessions": "store_cache",
+    "cached_recent_previews": "store_cache",
+    "cached_stats": "store_cache",
+    "cached_search_similar": "store_cache",
+    "clear_vector_store_cache": "store_cache"
+}
 
-# Enhanced functionality
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    """Lazily resolve component functions from their submodules."""
+    if name in _EXPORTS:
+        module = importlib.import_module(f".{_EXPORTS[name]}", __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
 
 # Enhanced functionality
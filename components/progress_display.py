@@ -1,8 +1,19 @@
 import streamlit as st
-import time
-from typing import Dict, Any, Optional
+from datetime import datetime
 from research.state import ResearchState, RESEARCH_STEPS
 
+# Timeline steps in execution order, with their positions precomputed so the
+# progress panel (redrawn on every rerun) avoids list scans.
+STEPS = ("generate_query", "web_research", "summarize_sources", "reflect_on_summary", "finalize_summary")
+STEP_INDEX = {step: i for i, step in enumerate(STEPS)}
+
+# Timeline cell style per step status: (emoji, color, background)
+STEP_STATUS_STYLES = {
+    "done": ("✅", "green", "#e8f5e8"),
+    "current": ("🔄", "blue", "#e8f0ff"),
+    "pending": ("⏳", "gray", "#f5f5f5"),
+}
+
 def display_research_progress(state: ResearchState):
     """Display dynamic research progress with beautiful UI."""
     
@@ -12,44 +23,36 @@ def display_research_progress(state: ResearchState):
     
     # Current step indicator
     current_step_info = RESEARCH_STEPS.get(state.current_step, {"name": "Unknown", "description": "Processing..."})
+    details = state.step_details or {}
     
     # Step timeline
     st.markdown("### Research Timeline")
     
-    # Create columns for step indicators
-    steps = ["generate_query", "web_research", "summarize_sources", "reflect_on_summary", "finalize_summary"]
-    cols = st.columns(len(steps))
+    # Render the whole timeline as a single HTML block
+    current_idx = STEP_INDEX.get(state.current_step, -1)
+    is_completed = state.current_step == "completed"
+    cells = []
     
-    for i, step in enumerate(steps):
-        with cols[i]:
-            step_info = RESEARCH_STEPS[step]
-            
-            # Determine step status
-            if state.current_step == step:
-                if state.current_step == "error":
-                    status_emoji = "❌"
-                    status_color = "red"
-                else:
-                    status_emoji = "🔄"
-                    status_color = "blue"
-            elif steps.index(state.current_step) > i if state.current_step in steps else False:
-                status_emoji = "✅"
-                status_color = "green"
-            elif state.current_step == "completed" and step == "finalize_summary":
-                status_emoji = "✅"
-                status_color = "green"
-            else:
-                status_emoji = "⏳"
-                status_color = "gray"
-            
-            # Display step
-            st.markdown(f"""
-                <div style="text-align: center; padding: 10px; border-radius: 10px; 
-                           background-color: {'#e8f5e8' if status_color == 'green' else '#e8f0ff' if status_color == 'blue' else '#ffe8e8' if status_color == 'red' else '#f5f5f5'};">
-                    <div style="font-size: 24px;">{status_emoji}</div>
-                    <div style="font-size: 12px; font-weight: bold; color: {status_color};">{step_info['name']}</div>
-                </div>
-            """, unsafe_allow_html=True)
+    for i, step in enumerate(STEPS):
+        step_name = RESEARCH_STEPS[step]['name']
+        
+        # Determine step status
+        if i < current_idx or (is_completed and step == "finalize_summary"):
+            status = "done"
+        elif i == current_idx:
+            status = "current"
+        else:
+            status = "pending"
+        status_emoji, status_color, background = STEP_STATUS_STYLES[status]
+        
+        cells.append(
+            f'<div style="flex: 1; text-align: center; padding: 10px; border-radius: 10px; background-color: {background};">'
+            f'<div style="font-size: 24px;">{status_emoji}</div>'
+            f'<div style="font-size: 12px; font-weight: bold; color: {status_color};">{step_name}</div>'
+            f'</div>'
+        )
+    
+    st.markdown(f'<div style="display: flex; gap: 8px;">{"".join(cells)}</div>', unsafe_allow_html=True)
     
     # Current step details
     if state.current_step != "idle":
@@ -61,10 +64,9 @@ def display_research_progress(state: ResearchState):
             st.markdown(current_step_info['description'])
             
             # Show step details if available
-            if state.step_details:
-                status = state.step_details.get('status', '')
-                if status:
-                    st.markdown(f"*{status}*")
+            status = details.get('status', '')
+            if status:
+                st.markdown(f"*{status}*")
         
         with col2:
             # Step progress indicator
@@ -87,9 +89,9 @@ def display_research_progress(state: ResearchState):
         st.success("🎉 Research completed successfully!")
         
         # Show completion stats
-        if state.step_details:
-            total_sources = state.step_details.get('total_sources', 0)
-            summary_length = state.step_details.get('summary_length', 0)
+        if details:
+            total_sources = details.get('total_sources', 0)
+            summary_length = details.get('summary_length', 0)
             
             col1, col2, col3 = st.columns(3)
             with col1:
@@ -107,38 +109,48 @@ def display_step_details(state: ResearchState):
         return
     
     details = state.step_details
+    query = details.get('query')
+    rationale = details.get('rationale')
+    sources_count = details.get('sources_count')
+    summary_length = details.get('summary_length')
+    knowledge_gap = details.get('knowledge_gap')
+    follow_up_query = details.get('follow_up_query')
+    partial_summary = details.get('partial_summary')
     
     # Query generation details
-    if state.current_step == "generate_query" and "query" in details:
+    if state.current_step == "generate_query" and query is not None:
         with st.expander("🔍 Generated Query Details", expanded=True):
-            st.markdown(f"**Search Query:** `{details['query']}`")
-            if "rationale" in details:
-                st.markdown(f"**Rationale:** {details['rationale']}")
+            st.markdown(f"**Search Query:** `{query}`")
+            if rationale is not None:
+                st.markdown(f"**Rationale:** {rationale}")
     
     # Web research details
-    elif state.current_step == "web_research" and "sources_count" in details:
+    elif state.current_step == "web_research" and sources_count is not None:
         with st.expander("🌐 Web Research Details", expanded=True):
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Sources Found", details['sources_count'])
+                st.metric("Sources Found", sources_count)
             with col2:
                 st.metric("Search API", details.get('search_api', 'Unknown'))
             
-            if "query" in details:
-                st.markdown(f"**Current Query:** `{details['query']}`")
+            if query is not None:
+                st.markdown(f"**Current Query:** `{query}`")
     
     # Summarization details
-    elif state.current_step == "summarize_sources" and "summary_length" in details:
+    elif state.current_step == "summarize_sources" and (summary_length is not None or partial_summary is not None):
         with st.expander("📝 Summarization Details", expanded=True):
-            st.metric("Summary Length", f"{details['summary_length']:,} characters")
+            if partial_summary is not None:
+                st.markdown(f"**Writing summary...**\n\n{partial_summary}")
+            else:
+                st.metric("Summary Length", f"{summary_length:,} characters")
     
     # Reflection details
     elif state.current_step == "reflect_on_summary":
         with st.expander("🤔 Reflection Details", expanded=True):
-            if "knowledge_gap" in details:
-                st.markdown(f"**Knowledge Gap Identified:** {details['knowledge_gap']}")
-            if "follow_up_query" in details:
-                st.markdown(f"**Follow-up Query:** `{details['follow_up_query']}`")
+            if knowledge_gap is not None:
+                st.markdown(f"**Knowledge Gap Identified:** {knowledge_gap}")
+            if follow_up_query is not None:
+                st.markdown(f"**Follow-up Query:** `{follow_up_query}`")
 
 def display_live_research_feed(state: ResearchState):
     """Display a live feed of research activities."""
@@ -166,13 +178,12 @@ def display_live_research_feed(state: ResearchState):
             activities = []
             
             # Add completed steps
-            steps = ["generate_query", "web_research", "summarize_sources", "reflect_on_summary", "finalize_summary"]
-            current_index = steps.index(state.current_step) if state.current_step in steps else -1
+            current_index = STEP_INDEX.get(state.current_step, -1)
             
-            for i, step in enumerate(steps):
+            for i, step in enumerate(STEPS):
                 if i < current_index or (state.current_step == "completed" and step == "finalize_summary"):
-                    step_info = RESEARCH_STEPS[step]
-                    activities.append(f"✅ {step_info['name']} - Completed")
+                    step_name = RESEARCH_STEPS[step]['name']
+                    activities.append(f"✅ {step_name} - Completed")
             
             # Display activities
             for activity in reversed(activities[-3:]):  # Show last 3 activities
@@ -182,16 +193,23 @@ def display_live_research_feed(state: ResearchState):
                     </div>
                 """, unsafe_allow_html=True)
 
+# Braille spinner animated client-side via CSS so rendering never blocks the script
+SPINNER_HTML = """
+    <style>
+        @keyframes research-spinner {{ to {{ transform: rotate(360deg); }} }}
+        .research-spinner {{
+            display: inline-block;
+            animation: research-spinner 1s steps(10) infinite;
+        }}
+    </style>
+    <div><span class="research-spinner">⠋</span> {text}</div>
+"""
+
 def create_animated_spinner(text: str = "Processing..."):
     """Create an animated spinner for loading states."""
     
     spinner_placeholder = st.empty()
-    
-    spinner_frames = ["⠋", "⠙", "⠹", "⠸", "⠼", "⠴", "⠦", "⠧", "⠇", "⠏"]
-    
-    for frame in spinner_frames:
-        spinner_placeholder.markdown(f"{frame} {text}")
-        time.sleep(0.1)
+    spinner_placeholder.markdown(SPINNER_HTML.format(text=text), unsafe_allow_html=True)
     
     return spinner_placeholder
 
@@ -229,7 +247,6 @@ def display_research_metrics(state: ResearchState):
             if state.completed_at:
                 duration = (state.completed_at - state.started_at).total_seconds()
             else:
-                from datetime import datetime
                 duration = (datetime.now() - state.started_at).total_seconds()
             
             st.metric(
@@ -1,147 +1,236 @@
+import orjson
 import streamlit as st
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, Optional
 from config.settings import ResearchConfig
 from research.llm_providers import test_llm_connection
+from storage.encoder import backend_fallback_reason
+from components.store_cache import (
+    store_key, cached_recent_previews, cached_stats, cached_search_similar, clear_vector_store_cache
+)
 
+_LLM_PROVIDER_OPTIONS = ("ollama", "lmstudio")
+_SEARCH_API_OPTIONS = ("duckduckgo", "tavily", "perplexity", "searxng")
+_EMBEDDING_OPTIONS = (
+    "all-MiniLM-L6-v2",
+    "all-mpnet-base-v2",
+    "sentence-transformers/all-MiniLM-L12-v2",
+    "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+)
+
+_EMBEDDING_BACKEND_OPTIONS = ("torch", "onnx", "openvino")
+
+# Widget help text, keyed by the config field each widget edits
+_HELP = {
+    "llm_provider": "Choose between Ollama or LMStudio for local LLM",
+    "local_llm": "Name of the local LLM model (e.g., gemma3:latest, llama3.2)",
+    "ollama_base_url": "Base URL for Ollama API",
+    "lmstudio_base_url": "Base URL for LMStudio OpenAI-compatible API",
+    "max_web_research_loops": "Number of research iterations to perform",
+    "search_api": "Web search API to use for research",
+    "fetch_full_page": "Include full page content in search results (slower but more comprehensive)",
+    "strip_thinking_tokens": "Remove <think> tokens from LLM responses",
+    "tavily_api_key": "Required for Tavily search API",
+    "perplexity_api_key": "Required for Perplexity search API",
+    "searxng_url": "URL for SearXNG instance",
+    "embedding_model": "Sentence transformer model for generating embeddings",
+    "embedding_backend": "Inference backend for embeddings (onnx runs int8-quantized weights, faster on CPU)"
+}
+
+# Selectbox positions by option name
+_SEARCH_IDX = {name: i for i, name in enumerate(_SEARCH_API_OPTIONS)}
+_EMBED_IDX = {name: i for i, name in enumerate(_EMBEDDING_OPTIONS)}
+_BACKEND_IDX = {name: i for i, name in enumerate(_EMBEDDING_BACKEND_OPTIONS)}
+
+@lru_cache(maxsize=8)
+def _build_config(
+    max_loops: int,
+    local_llm: str,
+    llm_provider: str,
+    ollama_url: str,
+    lmstudio_url: str,
+    search_api: str,
+    fetch_full_page: bool,
+    strip_thinking: bool,
+    tavily_key: Optional[str],
+    perplexity_key: Optional[str],
+    searxng_url: str,
+    embedding_model: str,
+    embedding_backend: str,
+    embedding_dimension: int
+) -> ResearchConfig:
+    """Build a validated config, reusing the instance when the sidebar values are unchanged."""
+    return ResearchConfig(
+        max_web_research_loops=max_loops,
+        local_llm=local_llm,
+        llm_provider=llm_provider,
+        ollama_base_url=ollama_url,
+        lmstudio_base_url=lmstudio_url,
+        search_api=search_api,
+        fetch_full_page=fetch_full_page,
+        strip_thinking_tokens=strip_thinking,
+        tavily_api_key=tavily_key,
+        perplexity_api_key=perplexity_key,
+        searxng_url=searxng_url,
+        embedding_model=embedding_model,
+        embedding_backend=embedding_backend,
+        embedding_dimension=embedding_dimension
+    )
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_connection_test(_config: ResearchConfig, provider: str, model: str, base_url: str) -> Dict[str, Any]:
+    """Test the LLM connection, reusing the result for the same provider, model and URL."""
+    return test_llm_connection(_config)
+
+# Sidebar sections are fragments rendered inside ``st.sidebar``, so widget edits
+# only rerun their own section instead of the whole page
+@st.fragment
 def render_configuration_sidebar(config: ResearchConfig) -> ResearchConfig:
     """Render the configuration sidebar and return updated config."""
     
-    st.sidebar.title("🔧 Research Configuration")
+    st.title("🔧 Research Configuration")
     
     # LLM Settings
-    st.sidebar.markdown("### 🤖 LLM Settings")
+    st.markdown("### 🤖 LLM Settings")
     
-    llm_provider = st.sidebar.selectbox(
+    llm_provider = st.selectbox(
         "LLM Provider",
-        options=["ollama", "lmstudio"],
+        options=_LLM_PROVIDER_OPTIONS,
         index=0 if config.llm_provider == "ollama" else 1,
-        help="Choose between Ollama or LMStudio for local LLM"
+        help=_HELP["llm_provider"]
     )
     
-    local_llm = st.sidebar.text_input(
+    local_llm = st.text_input(
         "Model Name",
         value=config.local_llm,
-        help="Name of the local LLM model (e.g., gemma3:latest, llama3.2)"
+        help=_HELP["local_llm"]
     )
     
     if llm_provider == "ollama":
-        ollama_url = st.sidebar.text_input(
+        ollama_url = st.text_input(
             "Ollama Base URL",
             value=config.ollama_base_url,
-            help="Base URL for Ollama API"
+            help=_HELP["ollama_base_url"]
         )
         lmstudio_url = config.lmstudio_base_url
     else:
-        lmstudio_url = st.sidebar.text_input(
+        lmstudio_url = st.text_input(
             "LMStudio Base URL",
             value=config.lmstudio_base_url,
-            help="Base URL for LMStudio OpenAI-compatible API"
+            help=_HELP["lmstudio_base_url"]
         )
         ollama_url = config.ollama_base_url
     
     # Test LLM Connection
-    if st.sidebar.button("🔍 Test LLM Connection"):
-        test_config = ResearchConfig(
-            llm_provider=llm_provider,
-            local_llm=local_llm,
-            ollama_base_url=ollama_url,
-            lmstudio_base_url=lmstudio_url,
-            **{k: v for k, v in config.model_dump().items() 
-               if k not in ['llm_provider', 'local_llm', 'ollama_base_url', 'lmstudio_base_url']}
-        )
+    if st.button("🔍 Test LLM Connection"):
+        test_config = config.model_copy(update={
+            "llm_provider": llm_provider,
+            "local_llm": local_llm,
+            "ollama_base_url": ollama_url,
+            "lmstudio_base_url": lmstudio_url
+        })
         
         with st.spinner("Testing connection..."):
-            result = test_llm_connection(test_config)
+            base_url = ollama_url if llm_provider == "ollama" else lmstudio_url
+            result = _cached_connection_test(test_config, llm_provider, local_llm, base_url)
+            
+            # Only successful checks are worth reusing; retry failures next time
+            if result["status"] != "success":
+                _cached_connection_test.clear()
             
             if result["status"] == "success":
-                st.sidebar.success("✅ LLM connection successful!")
-                with st.sidebar.expander("Connection Details"):
+                st.success("✅ LLM connection successful!")
+                with st.expander("Connection Details"):
                     st.write(f"**Provider:** {result['provider']}")
                     st.write(f"**Model:** {result['model']}")
                     st.write(f"**Base URL:** {result['base_url']}")
             else:
-                st.sidebar.error(f"❌ Connection failed: {result['error']}")
+                st.error(f"❌ Connection failed: {result['error']}")
     
-    st.sidebar.markdown("---")
+    st.markdown("---")
     
     # Research Settings
-    st.sidebar.markdown("### 🔬 Research Settings")
+    st.markdown("### 🔬 Research Settings")
     
-    max_loops = st.sidebar.slider(
+    max_loops = st.slider(
         "Research Depth",
         min_value=1,
         max_value=10,
         value=config.max_web_research_loops,
-        help="Number of research iterations to perform"
+        help=_HELP["max_web_research_loops"]
     )
     
-    search_api_options = ["duckduckgo", "tavily", "perplexity", "searxng"]
-    search_api = st.sidebar.selectbox(
+    search_api = st.selectbox(
         "Search API",
-        options=search_api_options,
-        index=search_api_options.index(config.search_api) if config.search_api in search_api_options else 0,
-        help="Web search API to use for research"
+        options=_SEARCH_API_OPTIONS,
+        index=_SEARCH_IDX.get(config.search_api, 0),
+        help=_HELP["search_api"]
     )
     
-    fetch_full_page = st.sidebar.checkbox(
+    fetch_full_page = st.checkbox(
         "Fetch Full Page Content",
         value=config.fetch_full_page,
-        help="Include full page content in search results (slower but more comprehensive)"
+        help=_HELP["fetch_full_page"]
     )
     
-    strip_thinking = st.sidebar.checkbox(
+    strip_thinking = st.checkbox(
         "Strip Thinking Tokens",
         value=config.strip_thinking_tokens,
-        help="Remove <think> tokens from LLM responses"
+        help=_HELP["strip_thinking_tokens"]
     )
     
-    st.sidebar.markdown("---")
+    st.markdown("---")
     
     # API Keys
-    st.sidebar.markdown("### 🔑 API Keys")
+    st.markdown("### 🔑 API Keys")
     
-    tavily_key = st.sidebar.text_input(
+    tavily_key = st.text_input(
         "Tavily API Key",
         value=config.tavily_api_key or "",
         type="password",
-        help="Required for Tavily search API"
+        help=_HELP["tavily_api_key"]
     )
     
-    perplexity_key = st.sidebar.text_input(
+    perplexity_key = st.text_input(
         "Perplexity API Key",
         value=config.perplexity_api_key or "",
         type="password",
-        help="Required for Perplexity search API"
+        help=_HELP["perplexity_api_key"]
     )
     
-    searxng_url = st.sidebar.text_input(
+    searxng_url = st.text_input(
         "SearXNG URL",
         value=config.searxng_url,
-        help="URL for SearXNG instance"
+        help=_HELP["searxng_url"]
     )
     
-    st.sidebar.markdown("---")
+    st.markdown("---")
     
     # Vector Embeddings
-    st.sidebar.markdown("### 🧠 Vector Embeddings")
-    
-    embedding_options = [
-        "all-MiniLM-L6-v2",
-        "all-mpnet-base-v2",
-        "sentence-transformers/all-MiniLM-L12-v2",
-        "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-    ]
-    embedding_model = st.sidebar.selectbox(
+    st.markdown("### 🧠 Vector Embeddings")
+    
+    embedding_model = st.selectbox(
         "Embedding Model",
-        options=embedding_options,
-        index=embedding_options.index(config.embedding_model) if config.embedding_model in embedding_options else 0,
-        help="Sentence transformer model for generating embeddings"
+        options=_EMBEDDING_OPTIONS,
+        index=_EMBED_IDX.get(config.embedding_model, 0),
+        help=_HELP["embedding_model"]
     )
     
-    st.sidebar.markdown("---")
+    embedding_backend = st.selectbox(
+        "Embedding Backend",
+        options=_EMBEDDING_BACKEND_OPTIONS,
+        index=_BACKEND_IDX.get(config.embedding_backend, 0),
+        help=_HELP["embedding_backend"]
+    )
+    if embedding_backend != "torch":
+        fallback = backend_fallback_reason(embedding_model, embedding_backend)
+        if fallback:
+            st.warning(f"Embeddings run on torch: {fallback}")
+    
+    st.markdown("---")
     
     # Advanced Settings
-    with st.sidebar.expander("⚙️ Advanced Settings"):
+    with st.expander("⚙️ Advanced Settings"):
         st.markdown("**Embedding Dimension**")
         st.text(f"{config.embedding_dimension} (auto-detected)")
         
@@ -156,95 +245,123 @@ def render_configuration_sidebar(config: ResearchConfig) -> ResearchConfig:
                 "search_api": search_api,
                 "fetch_full_page": fetch_full_page,
                 "strip_thinking_tokens": strip_thinking,
-                "embedding_model": embedding_model
+                "embedding_model": embedding_model,
+                "embedding_backend": embedding_backend
             }
             st.download_button(
                 "Download config.json",
-                data=str(config_dict),
+                data=orjson.dumps(config_dict, option=orjson.OPT_INDENT_2),
                 file_name="research_config.json",
                 mime="application/json"
             )
     
     # Create updated config
-    updated_config = ResearchConfig(
-        max_web_research_loops=max_loops,
-        local_llm=local_llm,
-        llm_provider=llm_provider,
-        ollama_base_url=ollama_url,
-        lmstudio_base_url=lmstudio_url,
-        search_api=search_api,
-        fetch_full_page=fetch_full_page,
-        strip_thinking_tokens=strip_thinking,
-        tavily_api_key=tavily_key if tavily_key else None,
-        perplexity_api_key=perplexity_key if perplexity_key else None,
-        searxng_url=searxng_url,
-        embedding_model=embedding_model,
-        embedding_dimension=config.embedding_dimension
+    updated_config = _build_config(
+        max_loops,
+        local_llm,
+        llm_provider,
+        ollama_url,
+        lmstudio_url,
+        search_api,
+        fetch_full_page,
+        strip_thinking,
+        tavily_key if tavily_key else None,
+        perplexity_key if perplexity_key else None,
+        searxng_url,
+        embedding_model,
+        embedding_backend,
+        config.embedding_dimension
     )
     
+    # Fragment reruns do not return to the caller, so publish via session state
+    st.session_state.sidebar_config = updated_config
     return updated_config
 
+@st.fragment
 def render_research_history_sidebar(vector_store):
     """Render research history in sidebar."""
     
-    st.sidebar.markdown("---")
-    st.sidebar.markdown("### 📚 Research History")
+    st.markdown("---")
+    st.markdown("### 📚 Research History")
     
-    # Get recent sessions
-    recent_sessions = vector_store.get_recent_sessions(limit=5)
+    # Get recent sessions; previews carry only a summary prefix and source count
+    recent_sessions = cached_recent_previews(vector_store, store_key(vector_store), limit=5)
     
     if recent_sessions:
-        for session in recent_sessions:
-            with st.sidebar.expander(f"📄 {session.topic[:30]}..."):
-                st.write(f"**Created:** {session.created_at.strftime('%Y-%m-%d %H:%M')}")
-                st.write(f"**Sources:** {len(session.sources)}")
-                
-                # Preview summary
-                summary_preview = session.summary[:100] + "..." if len(session.summary) > 100 else session.summary
-                st.write(f"**Summary:** {summary_preview}")
-                
-                # Load session button
-                if st.button(f"Load Session", key=f"load_{session.id}"):
-                    st.session_state.selected_session = session
-                    st.rerun()
+        # One radio and one Load button rather than a button per session; options are
+        # session IDs, so a kept pick never points at a different session after a refresh
+        session_by_id = {s.id: s for s in recent_sessions}
+        title_by_id = {s.id: f"📄 {s.topic[:30]} ({s.created_at:%m-%d})" for s in recent_sessions}
+        pick = st.radio(
+            "History",
+            list(session_by_id),
+            format_func=title_by_id.get,
+            index=None,
+            key="history_pick",
+            label_visibility="collapsed"
+        )
+        
+        if pick in session_by_id:
+            session = session_by_id[pick]
+            st.write(f"**Created:** {session.created_at.strftime('%Y-%m-%d %H:%M')}")
+            st.write(f"**Sources:** {session.source_count}")
+            
+            # Preview summary
+            summary_preview = session.summary_preview[:100] + "..." if len(session.summary_preview) > 100 else session.summary_preview
+            st.write(f"**Summary:** {summary_preview}")
+            
+            # Load the full session only when requested
+            if st.button("Load Session", key="load_history_pick"):
+                st.session_state.selected_session = vector_store.get_session(session.id)
+                st.rerun()
     else:
-        st.sidebar.info("No research history yet. Start your first research!")
+        st.info("No research history yet. Start your first research!")
     
     # Search similar research
-    st.sidebar.markdown("#### 🔍 Search Similar Research")
-    search_query = st.sidebar.text_input(
+    st.markdown("#### 🔍 Search Similar Research")
+    search_query = st.text_input(
         "Search query",
         placeholder="Enter topic to find similar research...",
         key="history_search"
     )
     
-    if search_query and st.sidebar.button("Search"):
-        similar_sessions = vector_store.search_similar(search_query, limit=3)
-        
+    # Search as you type; hits follow the current query, and the cached search
+    # keeps reruns (e.g. picking a hit) from repeating the lookup
+    if search_query:
+        similar_sessions = cached_search_similar(
+            vector_store, store_key(vector_store), search_query, limit=3, threshold=0.3
+        )
         if similar_sessions:
-            st.sidebar.markdown("**Similar Research:**")
-            for session, similarity in similar_sessions:
-                with st.sidebar.expander(f"📄 {session.topic[:25]}... ({similarity:.2f})"):
-                    st.write(f"**Similarity:** {similarity:.2%}")
-                    st.write(f"**Created:** {session.created_at.strftime('%Y-%m-%d')}")
-                    
-                    if st.button(f"Load", key=f"load_similar_{session.id}"):
-                        st.session_state.selected_session = session
-                        st.rerun()
+            st.markdown("**Similar Research:**")
+            similar_by_id = {session.id: session for session, _ in similar_sessions}
+            title_by_id = {session.id: f"📄 {session.topic[:25]}... ({similarity:.2%})" for session, similarity in similar_sessions}
+            similar_pick = st.radio(
+                "Similar Research",
+                list(similar_by_id),
+                format_func=title_by_id.get,
+                index=None,
+                key="similar_pick",
+                label_visibility="collapsed"
+            )
+            
+            if similar_pick in similar_by_id and st.button("Load", key="load_similar_pick"):
+                st.session_state.selected_session = similar_by_id[similar_pick]
+                st.rerun()
         else:
-            st.sidebar.info("No similar research found.")
+            st.info("No similar research found.")
 
+@st.fragment
 def render_system_status_sidebar(vector_store):
     """Render system status information in sidebar."""
     
-    st.sidebar.markdown("---")
-    st.sidebar.markdown("### 📊 System Status")
+    st.markdown("---")
+    st.markdown("### 📊 System Status")
     
     # Get vector store stats
-    stats = vector_store.get_stats()
+    stats = cached_stats(vector_store, store_key(vector_store))
     
     if stats:
-        col1, col2 = st.sidebar.columns(2)
+        col1, col2 = st.columns(2)
         
         with col1:
             st.metric("Total Sessions", stats.get("total_sessions", 0))
@@ -252,19 +369,20 @@ def render_system_status_sidebar(vector_store):
         with col2:
             st.metric("Recent (7d)", stats.get("recent_sessions", 0))
         
-        st.sidebar.metric(
+        st.metric(
             "With Embeddings", 
             stats.get("sessions_with_embeddings", 0)
         )
         
         # Cleanup option
         if stats.get("total_sessions", 0) > 50:
-            if st.sidebar.button("🧹 Cleanup Old Sessions"):
+            if st.button("🧹 Cleanup Old Sessions"):
                 deleted = vector_store.cleanup_old_sessions(keep_recent=50)
+                clear_vector_store_cache()
                 if deleted > 0:
-                    st.sidebar.success(f"Deleted {deleted} old sessions")
+                    st.success(f"Deleted {deleted} old sessions")
                 else:
-                    st.sidebar.info("No sessions to cleanup")
+                    st.info("No sessions to cleanup")
 
 def render_help_sidebar():
     """Render help and tips in sidebar."""
@@ -0,0 +1,38 @@
+import streamlit as st
+
+def vector_store_key(db_path: str, config) -> tuple:
+    """Identify a vector store by its database and embedding settings."""
+    return (db_path, config.embedding_model, config.embedding_backend, config.embedding_dimension)
+
+def store_key(vector_store) -> tuple:
+    """Cache key identifying the vector store backing the cached reads."""
+    return vector_store_key(vector_store.db_path, vector_store.config)
+
+# Leading underscores keep Streamlit from hashing the vector store itself;
+# ``store_key`` distinguishes stores instead.
+@st.cache_data(ttl=30, show_spinner=False)
+def cached_recent_sessions(_vector_store, store_key: tuple, limit: int):
+    """Get recent sessions, reusing results across reruns."""
+    return _vector_store.get_recent_sessions(limit=limit)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def cached_recent_previews(_vector_store, store_key: tuple, limit: int):
+    """Get recent session previews, reusing results across reruns."""
+    return _vector_store.get_recent_sessions_preview(limit=limit)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def cached_stats(_vector_store, store_key: tuple):
+    """Get vector store statistics, reusing results across reruns."""
+    return _vector_store.get_stats()
+
+@st.cache_data(ttl=30, show_spinner=False)
+def cached_search_similar(_vector_store, store_key: tuple, query: str, limit: int, threshold: float):
+    """Search similar sessions, reusing results for repeated queries."""
+    return _vector_store.search_similar(query, limit=limit, threshold=threshold)
+
+def clear_vector_store_cache():
+    """Invalidate cached vector store reads after the store changes."""
+    cached_recent_sessions.clear()
+    cached_recent_previews.clear()
+    cached_stats.clear()
+    cached_search_similar.clear()
@@ -1,7 +1,28 @@
 """Configuration module for Streamlit Deep Researcher."""
 
-from .settings import ResearchConfig, StreamlitConfig, research_config, streamlit_config
+import importlib
 
-__all__ = ["ResearchConfig", "StreamlitConfig", "research_config", "streamlit_config"]
+# Public names mapped to the submodule that defines them; settings (and the
+# env-derived default configs) are only built on first attribute access.
+_EXPORTS = {
+    "ResearchConfig": "settings",
+    "StreamlitConfig": "settings",
+    "research_config": "settings",
+    "streamlit_config": "settings"
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    """Lazily resolve configuration objects from their submodules."""
+    if name in _EXPORTS:
+        module = importlib.import_module(f".{_EXPORTS[name]}", __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
 
 # Enhanced functionality
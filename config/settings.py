@@ -1,7 +1,7 @@
 import os
 from enum import Enum
 from typing import Literal, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -20,6 +20,9 @@ class LLMProvider(Enum):
 class ResearchConfig(BaseModel):
     """Configuration for the research engine."""
     
+    # Immutable and hashable, so instances can key caches directly
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     # Research Settings
     max_web_research_loops: int = Field(
         default=3,
@@ -100,6 +103,12 @@ class ResearchConfig(BaseModel):
         description="Sentence transformer model for embeddings"
     )
     
+    embedding_backend: Literal["torch", "onnx", "openvino"] = Field(
+        default="torch",
+        title="Embedding Backend",
+        description="Inference backend for the embedding model (onnx uses int8-quantized weights)"
+    )
+    
     embedding_dimension: int = Field(
         default=384,
         title="Embedding Dimension",
@@ -122,12 +131,15 @@ class ResearchConfig(BaseModel):
             perplexity_api_key=os.getenv("PERPLEXITY_API_KEY"),
             searxng_url=os.getenv("SEARXNG_URL", "http://localhost:8888"),
             embedding_model=os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2"),
+            embedding_backend=os.getenv("EMBEDDING_BACKEND", "torch"),
             embedding_dimension=int(os.getenv("EMBEDDING_DIMENSION", "384"))
         )
 
 class StreamlitConfig(BaseModel):
     """Configuration for Streamlit UI."""
     
+    model_config = ConfigDict(frozen=True, extra="forbid")
+    
     theme: str = Field(
         default="dark",
         title="Theme",
@@ -1,17 +1,31 @@
 """Research module for Streamlit Deep Researcher."""
 
-from .graph import create_research_graph, StreamlitResearchGraph
-from .state import ResearchState, ResearchSession, RESEARCH_STEPS
-from .llm_providers import get_llm_provider, test_llm_connection
+import importlib
 
-__all__ = [
-    "create_research_graph", 
-    "StreamlitResearchGraph",
-    "ResearchState", 
-    "ResearchSession", 
-    "RESEARCH_STEPS",
-    "get_llm_provider",
-    "test_llm_connection"
-]
+# Public names mapped to the submodule that defines them; the graph and LLM
+# provider stacks are only imported on first attribute access (PEP 562).
+_EXPORTS = {
+    "create_research_graph": "graph",
+    "StreamlitResearchGraph": "graph",
+    "ResearchState": "state",
+    "ResearchSession": "state",
+    "RESEARCH_STEPS": "state",
+    "get_llm_provider": "llm_providers",
+    "test_llm_connection": "llm_providers"
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    """Lazily resolve research objects from their submodules."""
+    if name in _EXPORTS:
+        module = importlib.import_module(f".{_EXPORTS[name]}", __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
 
 # Enhanced functionality
@@ -1,39 +1,191 @@
-import json
+import sqlite3
+import threading
+import time
 import uuid
 from datetime import datetime
-from typing import Dict, Any, Callable, Optional
+from typing import TYPE_CHECKING, Dict, Any, Callable, Optional
 from typing_extensions import Literal
 
+from cachetools import TTLCache
 from langchain_core.messages import HumanMessage, SystemMessage
-from langgraph.graph import START, END, StateGraph
 
 from config.settings import ResearchConfig
-from research.state import ResearchState, ResearchStateInput, ResearchStateOutput, RESEARCH_STEPS
+from research.state import (
+    ResearchState, ResearchStateInput, ResearchStateOutput, QueryOutput, ReflectionOutput
+)
 from research.utils import (
-    deduplicate_and_format_sources, tavily_search, format_sources, 
+    deduplicate_and_format_sources, tavily_search, 
     perplexity_search, duckduckgo_search, searxng_search, 
     strip_thinking_tokens, get_config_value, get_current_date
 )
-from research.prompts import query_writer_instructions, summarizer_instructions, reflection_instructions
+from research.prompts import (
+    query_writer_instructions, render_query_writer_input, summarizer_instructions,
+    reflection_instructions, render_reflection_input
+)
 from research.llm_providers import get_llm_provider
 
+# LangGraph is imported when the first graph is built, not when this module loads
+if TYPE_CHECKING:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    from langgraph.graph.state import CompiledStateGraph
+
+# Node checkpoints for resuming a research run that failed or was stopped partway
+CHECKPOINT_DB_PATH = ".research_cache.db"
+
+# Checkpoint threads of failed or stopped runs not resumed within this time are deleted
+CHECKPOINT_TTL = 24 * 3600  # seconds
+
+_checkpointer = None
+_checkpointer_lock = threading.Lock()
+
+# Topics must be near-identical to reuse another run's query; small edits such
+# as a different year still embed above the default semantic threshold
+QUERY_SEMANTIC_THRESHOLD = 0.98
+
+# Typical summary length, used to estimate progress while the summary streams in
+SUMMARY_PROGRESS_CHARS = 4000
+# Trailing characters of the streaming summary shown in the UI
+PARTIAL_SUMMARY_CHARS = 500
+
+# Recent search results shared across runs; repeated queries within the TTL skip the network
+SEARCH_CACHE_SIZE = 256
+SEARCH_CACHE_TTL = 3600  # seconds
+_search_cache = TTLCache(maxsize=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL)
+_search_cache_lock = threading.Lock()
+
+def _get_checkpointer() -> "SqliteSaver":
+    """Get the process-wide SQLite checkpointer, shared by all research threads."""
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    
+    global _checkpointer
+    with _checkpointer_lock:
+        if _checkpointer is None:
+            conn = sqlite3.connect(CHECKPOINT_DB_PATH, check_same_thread=False)
+            # Last use of each checkpoint thread, for pruning abandoned ones
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS research_threads (
+                        thread_id TEXT PRIMARY KEY,
+                        updated_at INTEGER NOT NULL
+                    )
+                """)
+            _checkpointer = SqliteSaver(conn)
+        return _checkpointer
+
+# The thread registry shares the checkpointer's connection and lock, so its
+# writes never contend with checkpoint writes; failures only skip bookkeeping
+
+def _touch_thread(checkpointer: "SqliteSaver", thread_id: str):
+    """Record that a checkpoint thread was just used."""
+    try:
+        with checkpointer.lock, checkpointer.conn as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO research_threads (thread_id, updated_at) VALUES (?, ?)",
+                (thread_id, int(time.time()))
+            )
+    except sqlite3.Error as e:
+        print(f"Error recording research checkpoint: {e}")
+
+def _release_thread(checkpointer: "SqliteSaver", thread_id: str):
+    """Delete a checkpoint thread and its registry entry."""
+    try:
+        checkpointer.delete_thread(thread_id)
+        with checkpointer.lock, checkpointer.conn as conn:
+            conn.execute("DELETE FROM research_threads WHERE thread_id = ?", (thread_id,))
+    except sqlite3.Error as e:
+        print(f"Error deleting research checkpoint: {e}")
+
+def _prune_abandoned_threads(checkpointer: "SqliteSaver"):
+    """Delete checkpoint threads of runs that were not resumed within CHECKPOINT_TTL."""
+    try:
+        with checkpointer.lock:
+            rows = checkpointer.conn.execute(
+                "SELECT thread_id FROM research_threads WHERE updated_at < ?",
+                (int(time.time()) - CHECKPOINT_TTL,)
+            ).fetchall()
+    except sqlite3.Error as e:
+        print(f"Error pruning research checkpoints: {e}")
+        return
+    
+    for (thread_id,) in rows:
+        _release_thread(checkpointer, thread_id)
+
+def _iter_sources(sources):
+    """Yield source URLs as-is and formatted sources line by line."""
+    for source in sources:
+        if not isinstance(source, str):
+            continue
+        if source.startswith('http'):
+            yield source
+        else:
+            yield from (line for line in source.split('\n') if line.strip())
+
+class ResearchCancelled(Exception):
+    """Raised when a running research workflow is stopped by the user."""
+
 class StreamlitResearchGraph:
     """Research graph with Streamlit progress callbacks."""
     
-    def __init__(self, config: ResearchConfig, progress_callback: Optional[Callable] = None):
+    def __init__(self, config: ResearchConfig, progress_callback: Optional[Callable] = None,
+                 cancel_event: Optional[threading.Event] = None):
         self.config = config
         self.progress_callback = progress_callback
+        self.cancel_event = cancel_event
         self.llm_provider = get_llm_provider(config)
+        # Invalid output and provider rejections fall back to defaults rather than failing the run
+        self._fallback_errors = (ValueError, AttributeError, *self.llm_provider.structured_output_errors())
+        self._search_api = get_config_value(config.search_api)
+        self._search_fn = self._resolve_search_fn()
+        self._current_date = get_current_date()
+        self.checkpointer = _get_checkpointer()
         self.graph = self._build_graph()
     
+    def _resolve_search_fn(self) -> Callable[[str, int], Dict[str, Any]]:
+        """Bind the configured search API once, as a function of (query, loop count)."""
+        search_api = self._search_api
+        fetch_full_page = self.config.fetch_full_page
+        
+        if search_api == "tavily":
+            return lambda query, loop_count: tavily_search(query, fetch_full_page=fetch_full_page, max_results=3)
+        elif search_api == "perplexity":
+            return lambda query, loop_count: perplexity_search(query, loop_count)
+        elif search_api == "duckduckgo":
+            return lambda query, loop_count: duckduckgo_search(query, max_results=3, fetch_full_page=fetch_full_page)
+        elif search_api == "searxng":
+            return lambda query, loop_count: searxng_search(query, max_results=3, fetch_full_page=fetch_full_page)
+        else:
+            raise ValueError(f"Unsupported search API: {self.config.search_api}")
+    
+    def _cached_search(self, query: str, loop_count: int) -> Dict[str, Any]:
+        """Run the configured search, answering repeats from the shared TTL cache."""
+        # Perplexity labels its sources with the loop number, so that is part of its key
+        key = (self._search_api, query, self.config.fetch_full_page,
+               loop_count if self._search_api == "perplexity" else None)
+        with _search_cache_lock:
+            search_results = _search_cache.get(key)
+        
+        if search_results is None:
+            search_results = self._search_fn(query, loop_count)
+            # Empty results are often transient failures, so they are not cached
+            if search_results.get('results'):
+                with _search_cache_lock:
+                    _search_cache[key] = search_results
+        return search_results
+    
     def _update_progress(self, state: ResearchState, step_name: str, progress: float = 0.0, details: Optional[Dict[str, Any]] = None):
         """Update progress and notify callback."""
+        # Cooperative cancellation, checked as each node reports progress
+        if self.cancel_event is not None and self.cancel_event.is_set() and step_name != "error":
+            raise ResearchCancelled("Research stopped by user")
+        
         state.update_step(step_name, progress, details)
         if self.progress_callback:
             self.progress_callback(state)
     
-    def _build_graph(self) -> StateGraph:
+    def _build_graph(self) -> "CompiledStateGraph":
         """Build the research graph."""
+        from langgraph.graph import START, END, StateGraph
+        
         builder = StateGraph(
             ResearchState, 
             input=ResearchStateInput, 
@@ -55,38 +207,31 @@ class StreamlitResearchGraph:
         builder.add_conditional_edges("reflect_on_summary", self._route_research)
         builder.add_edge("finalize_summary", END)
         
-        return builder.compile()
+        return builder.compile(checkpointer=self.checkpointer)
     
     def _generate_query(self, state: ResearchState) -> Dict[str, Any]:
         """Generate search query based on research topic."""
         self._update_progress(state, "generate_query", 0.1, {"status": "Generating search query..."})
         
         try:
-            # Format the prompt
-            current_date = get_current_date()
-            formatted_prompt = query_writer_instructions.format(
-                current_date=current_date,
+            # Format the per-call input; the system prompt stays constant
+            formatted_input = render_query_writer_input(
+                current_date=self._current_date,
                 research_topic=state.research_topic
             )
             
-            # Generate query using LLM
-            result = self.llm_provider.invoke([
-                SystemMessage(content=formatted_prompt),
-                HumanMessage(content="Generate a query for web search:")
-            ], json_mode=True)
-            
-            # Parse JSON response
+            # Generate query using LLM, constrained to the QueryOutput schema
             try:
-                query_data = json.loads(result.content)
-                search_query = query_data['query']
-                rationale = query_data.get('rationale', '')
-            except (json.JSONDecodeError, KeyError):
-                # Fallback if JSON parsing fails
-                if self.config.strip_thinking_tokens:
-                    content = strip_thinking_tokens(result.content)
-                else:
-                    content = result.content
-                search_query = content
+                result = self.llm_provider.invoke([
+                    SystemMessage(content=query_writer_instructions),
+                    HumanMessage(content=formatted_input)
+                ], semantic_scope="generate_query", semantic_text=state.research_topic,
+                   semantic_threshold=QUERY_SEMANTIC_THRESHOLD, structured_output=QueryOutput)
+                search_query = result.query
+                rationale = result.rationale
+            except self._fallback_errors:
+                # Fallback if the output fails schema validation
+                search_query = state.research_topic
                 rationale = "Generated query"
             
             self._update_progress(state, "generate_query", 1.0, {
@@ -110,32 +255,8 @@ class StreamlitResearchGraph:
         })
         
         try:
-            # Get search API
-            search_api = get_config_value(self.config.search_api)
-            
-            # Perform search based on configured API
-            if search_api == "tavily":
-                search_results = tavily_search(
-                    state.search_query, 
-                    fetch_full_page=self.config.fetch_full_page, 
-                    max_results=3
-                )
-            elif search_api == "perplexity":
-                search_results = perplexity_search(state.search_query, state.research_loop_count)
-            elif search_api == "duckduckgo":
-                search_results = duckduckgo_search(
-                    state.search_query, 
-                    max_results=3, 
-                    fetch_full_page=self.config.fetch_full_page
-                )
-            elif search_api == "searxng":
-                search_results = searxng_search(
-                    state.search_query, 
-                    max_results=3, 
-                    fetch_full_page=self.config.fetch_full_page
-                )
-            else:
-                raise ValueError(f"Unsupported search API: {self.config.search_api}")
+            # Perform search with the configured API, reusing recent identical searches
+            search_results = self._cached_search(state.search_query, state.research_loop_count)
             
             # Format search results
             search_str = deduplicate_and_format_sources(
@@ -144,23 +265,23 @@ class StreamlitResearchGraph:
                 fetch_full_page=self.config.fetch_full_page
             )
             
-            # Extract individual source URLs for tracking
-            sources_list = []
-            if 'results' in search_results:
-                for result in search_results['results']:
-                    if 'url' in result:
-                        sources_list.append(result['url'])
+            # Extract source URLs not already gathered in earlier loops
+            result_urls = dict.fromkeys(
+                result['url'] for result in search_results.get('results', []) if 'url' in result
+            )
+            sources_list = [url for url in result_urls if url not in state.sources_set]
             
-            sources_count = len(sources_list)
+            sources_count = len(result_urls)
             
             self._update_progress(state, "web_research", 1.0, {
                 "status": f"Found {sources_count} sources",
                 "sources_count": sources_count,
-                "search_api": search_api
+                "search_api": self._search_api
             })
             
             return {
                 "sources_gathered": sources_list,
+                "sources_set": state.sources_set.union(sources_list),
                 "research_loop_count": state.research_loop_count + 1,
                 "web_research_results": [search_str]
             }
@@ -196,20 +317,25 @@ class StreamlitResearchGraph:
                     f"<User Input>\n{state.research_topic}\n</User Input>\n\n"
                 )
             
-            # Generate summary using LLM
-            result = self.llm_provider.invoke([
+            # Stream the summary so the UI shows it as it is written
+            running_summary = ""
+            for chunk in self.llm_provider.invoke_stream([
                 SystemMessage(content=summarizer_instructions),
                 HumanMessage(content=human_message_content)
-            ])
+            ]):
+                running_summary += chunk
+                self._update_progress(state, "summarize_sources", min(0.95, len(running_summary) / SUMMARY_PROGRESS_CHARS), {
+                    "partial_summary": running_summary[-PARTIAL_SUMMARY_CHARS:]
+                })
             
             # Process result
-            running_summary = result.content
             if self.config.strip_thinking_tokens:
                 running_summary = strip_thinking_tokens(running_summary)
             
             self._update_progress(state, "summarize_sources", 1.0, {
                 "status": "Summary updated",
-                "summary_length": len(running_summary)
+                "summary_length": len(running_summary),
+                "partial_summary": None
             })
             
             return {"running_summary": running_summary}
@@ -226,23 +352,24 @@ class StreamlitResearchGraph:
         })
         
         try:
-            # Generate reflection using LLM
-            result = self.llm_provider.invoke([
-                SystemMessage(content=reflection_instructions.format(research_topic=state.research_topic)),
-                HumanMessage(content=f"Reflect on our existing knowledge:\n===\n{state.running_summary}\n===\n"
-                                   f"And now identify a knowledge gap and generate a follow-up web search query:")
-            ], json_mode=True)
-            
-            # Parse reflection result
+            # Generate reflection using LLM, constrained to the ReflectionOutput schema.
+            # Not semantically cached: each loop's summary extends the previous one and
+            # would match it, repeating the same follow-up query every loop
             try:
-                reflection_content = json.loads(result.content)
-                follow_up_query = reflection_content.get('follow_up_query')
-                knowledge_gap = reflection_content.get('knowledge_gap', '')
+                result = self.llm_provider.invoke([
+                    SystemMessage(content=reflection_instructions),
+                    HumanMessage(content=render_reflection_input(
+                        research_topic=state.research_topic,
+                        running_summary=state.running_summary
+                    ))
+                ], structured_output=ReflectionOutput)
+                follow_up_query = result.follow_up_query
+                knowledge_gap = result.knowledge_gap
                 
                 if not follow_up_query:
                     follow_up_query = f"Tell me more about {state.research_topic}"
                     
-            except (json.JSONDecodeError, KeyError, AttributeError):
+            except self._fallback_errors:
                 follow_up_query = f"Tell me more about {state.research_topic}"
                 knowledge_gap = "Additional information needed"
             
@@ -266,27 +393,12 @@ class StreamlitResearchGraph:
         })
         
         try:
-            # Deduplicate sources - handle both URL strings and formatted sources
-            seen_sources = set()
-            unique_sources = []
-            
-            for source in state.sources_gathered:
-                if isinstance(source, str):
-                    # If it's a URL, add it directly
-                    if source.startswith('http') and source not in seen_sources:
-                        seen_sources.add(source)
-                        unique_sources.append(source)
-                    else:
-                        # If it's formatted text, split by lines
-                        for line in source.split('\n'):
-                            if line.strip() and line not in seen_sources:
-                                seen_sources.add(line)
-                                unique_sources.append(line)
+            # Deduplicate sources in order - handle both URL strings and formatted sources
+            unique_sources = list(dict.fromkeys(_iter_sources(state.sources_gathered)))
             
             # Create final summary with sources
             if unique_sources:
-                numbered_sources = [f"{i+1}. {source}" for i, source in enumerate(unique_sources)]
-                all_sources = "\n".join(numbered_sources)
+                all_sources = "\n".join(f"{i+1}. {source}" for i, source in enumerate(unique_sources))
                 final_summary = f"## Summary\n{state.running_summary}\n\n### Sources:\n{all_sources}"
             else:
                 final_summary = f"## Summary\n{state.running_summary}"
@@ -312,8 +424,12 @@ class StreamlitResearchGraph:
         else:
             return "finalize_summary"
     
-    def run_research(self, research_topic: str) -> ResearchState:
-        """Run the complete research workflow."""
+    def run_research(self, research_topic: str, thread_id: Optional[str] = None) -> ResearchState:
+        """Run the complete research workflow.
+        
+        Each attempt checkpoints under its own thread; passing the thread_id of a
+        failed or stopped attempt resumes it after its last completed node.
+        """
         # Initialize state
         state = ResearchState(
             research_topic=research_topic,
@@ -322,9 +438,24 @@ class StreamlitResearchGraph:
             total_steps=self.config.max_web_research_loops
         )
         
+        thread_id = thread_id or uuid.uuid4().hex
+        run_config = {"configurable": {"thread_id": thread_id}}
+        
         try:
-            # Run the graph
-            result = self.graph.invoke({"research_topic": research_topic})
+            _prune_abandoned_threads(self.checkpointer)
+            _touch_thread(self.checkpointer, thread_id)
+            
+            # Resume after the last completed node if this attempt stopped partway
+            snapshot = self.graph.get_state(run_config)
+            if snapshot.next:
+                result = self.graph.invoke(None, run_config)
+            else:
+                if snapshot.values:
+                    self.checkpointer.delete_thread(thread_id)
+                result = self.graph.invoke({"research_topic": research_topic}, run_config)
+            
+            # Completed runs leave no checkpoints behind
+            _release_thread(self.checkpointer, thread_id)
             
             # Update final state
             state.running_summary = result.get("running_summary", "")
@@ -336,6 +467,7 @@ class StreamlitResearchGraph:
             state.mark_error(str(e))
             raise
 
-def create_research_graph(config: ResearchConfig, progress_callback: Optional[Callable] = None) -> StreamlitResearchGraph:
+def create_research_graph(config: ResearchConfig, progress_callback: Optional[Callable] = None,
+                          cancel_event: Optional[threading.Event] = None) -> StreamlitResearchGraph:
     """Create a research graph instance."""
-    return StreamlitResearchGraph(config, progress_callback)
+    return StreamlitResearchGraph(config, progress_callback, cancel_event)
@@ -1,93 +1,365 @@
-from typing import Optional, Dict, Any
-from langchain_ollama import ChatOllama
-from langchain_openai import ChatOpenAI
+import hashlib
+import orjson
+import sqlite3
+import threading
+import time
+import uuid
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from typing import Optional, Dict, Any, Callable, Iterator, Type
+from pydantic import BaseModel
+from langchain_core.messages import AIMessage
 from config.settings import ResearchConfig
 
+# Responses are generated at temperature 0, so identical prompts can be answered from disk
+LLM_CACHE_PATH = "llm_cache.db"
+LLM_CACHE_TTL = 7 * 24 * 3600  # seconds
+# Newest exact-match responses kept on disk; older ones are pruned on write
+LLM_CACHE_MAX_ROWS = 2000
+# Minimum cosine similarity for a semantic cache hit
+SEMANTIC_CACHE_THRESHOLD = 0.85
+# Most recent semantic cache entries compared per lookup
+SEMANTIC_CACHE_MAX_ROWS = 500
+
+# Keep-alive connections to the local LLM server, reused across calls
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=8)
+_http_client = httpx.Client(limits=HTTP_LIMITS, timeout=None)
+
 class LLMProvider:
     """Base class for LLM providers."""
     
+    # Chat model instances shared across providers (and Streamlit reruns),
+    # keyed by (provider class, base URL, model, JSON mode)
+    _llm_instances: Dict[tuple, Any] = {}
+    _llm_instances_lock = threading.Lock()
+    
     def __init__(self, config: ResearchConfig):
         self.config = config
-        self._llm = None
-        self._llm_json = None
+    
+    def _shared_llm(self, base_url: str, json_mode: bool, factory: Callable[[], Any]):
+        """Return the shared chat model for this endpoint, creating it on first use."""
+        key = (type(self).__name__, base_url, self.config.local_llm, json_mode)
+        with self._llm_instances_lock:
+            llm = self._llm_instances.get(key)
+            if llm is None:
+                llm = self._llm_instances[key] = factory()
+        return llm
     
     def get_llm(self, json_mode: bool = False):
         """Get LLM instance with optional JSON mode."""
         raise NotImplementedError
     
-    def invoke(self, messages, json_mode: bool = False):
-        """Invoke the LLM with messages."""
+    def invoke(self, messages, json_mode: bool = False,
+               semantic_scope: Optional[str] = None, semantic_text: Optional[str] = None,
+               structured_output: Optional[Type[BaseModel]] = None,
+               semantic_threshold: Optional[float] = None):
+        """Invoke the LLM with messages (semantic cache hints are ignored here).
+        
+        With structured_output, the server is constrained to that schema and the
+        parsed model instance is returned instead of a message.
+        """
         llm = self.get_llm(json_mode=json_mode)
+        if structured_output is not None:
+            try:
+                return llm.with_structured_output(structured_output, method="json_schema").invoke(messages)
+            except self.structured_output_errors() as e:
+                # Server or model without schema support: ask for plain JSON and validate it here
+                print(f"Structured output unavailable, falling back to JSON mode: {e}")
+                response = self.get_llm(json_mode=True).invoke(messages)
+                return structured_output.model_validate_json(response.content)
         return llm.invoke(messages)
+    
+    def structured_output_errors(self) -> tuple:
+        """Exception types the server raises when it rejects a structured output request."""
+        return ()
+    
+    def invoke_stream(self, messages) -> Iterator[str]:
+        """Invoke the LLM with messages, yielding text chunks as they are generated."""
+        for chunk in self.get_llm().stream(messages):
+            if isinstance(chunk.content, str) and chunk.content:
+                yield chunk.content
 
 class OllamaProvider(LLMProvider):
     """Ollama LLM provider."""
     
     def get_llm(self, json_mode: bool = False):
         """Get Ollama LLM instance."""
-        if json_mode:
-            if self._llm_json is None:
-                self._llm_json = ChatOllama(
-                    base_url=self.config.ollama_base_url,
-                    model=self.config.local_llm,
-                    temperature=0,
-                    format="json"
-                )
-            return self._llm_json
-        else:
-            if self._llm is None:
-                self._llm = ChatOllama(
-                    base_url=self.config.ollama_base_url,
-                    model=self.config.local_llm,
-                    temperature=0
-                )
-            return self._llm
+        from langchain_ollama import ChatOllama
+        
+        base_url = self.config.ollama_base_url
+        extra = {"format": "json"} if json_mode else {}
+        return self._shared_llm(base_url, json_mode, lambda: ChatOllama(
+            base_url=base_url,
+            model=self.config.local_llm,
+            temperature=0,
+            client_kwargs={"limits": HTTP_LIMITS},
+            **extra
+        ))
+    
+    def structured_output_errors(self) -> tuple:
+        """Ollama reports unsupported formats and models as response errors."""
+        from ollama import ResponseError
+        return (ResponseError,)
 
 class LMStudioProvider(LLMProvider):
     """LMStudio LLM provider (OpenAI-compatible)."""
     
     def get_llm(self, json_mode: bool = False):
         """Get LMStudio LLM instance."""
-        if json_mode:
-            if self._llm_json is None:
-                self._llm_json = ChatOpenAI(
-                    base_url=self.config.lmstudio_base_url,
-                    model=self.config.local_llm,
-                    temperature=0,
-                    api_key="lm-studio"  # LMStudio doesn't require real API key
+        from langchain_openai import ChatOpenAI
+        
+        base_url = self.config.lmstudio_base_url
+        return self._shared_llm(base_url, json_mode, lambda: ChatOpenAI(
+            base_url=base_url,
+            model=self.config.local_llm,
+            temperature=0,
+            api_key="lm-studio",  # LMStudio doesn't require real API key
+            http_client=_http_client
+        ))
+    
+    def structured_output_errors(self) -> tuple:
+        """OpenAI-compatible servers reject unsupported response formats as bad requests."""
+        from openai import BadRequestError
+        return (BadRequestError,)
+
+class SemanticLLMCache:
+    """Response cache matched by embedding similarity of a caller-chosen text."""
+    
+    def __init__(self, config: ResearchConfig, db_path: str = LLM_CACHE_PATH,
+                 ttl: int = LLM_CACHE_TTL, threshold: float = SEMANTIC_CACHE_THRESHOLD):
+        self.config = config
+        self.db_path = db_path
+        self.ttl = ttl
+        self.threshold = threshold
+        self._init_database()
+    
+    def _init_database(self):
+        """Initialize SQLite table for semantically cached responses."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_semantic_cache (
+                    scope TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    content TEXT NOT NULL,
+                    created_at INTEGER NOT NULL,
+                    run_id TEXT  -- Run that stored the entry; never served back to it
                 )
-            return self._llm_json
-        else:
-            if self._llm is None:
-                self._llm = ChatOpenAI(
-                    base_url=self.config.lmstudio_base_url,
-                    model=self.config.local_llm,
-                    temperature=0,
-                    api_key="lm-studio"  # LMStudio doesn't require real API key
+            """)
+            # Tables created before run tracking lack the run_id column
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(llm_semantic_cache)")}
+            if "run_id" not in columns:
+                conn.execute("ALTER TABLE llm_semantic_cache ADD COLUMN run_id TEXT")
+            conn.execute("DROP INDEX IF EXISTS idx_semantic_scope")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_semantic_scope_time ON llm_semantic_cache(scope, created_at)"
+            )
+            conn.commit()
+    
+    def _embed(self, text: str) -> np.ndarray:
+        """Embed text as an L2-normalized float32 vector."""
+        # Imported here so the LLM stack does not load the embedding stack until needed
+        from storage import get_encoder, encode_texts
+        model = get_encoder(self.config.embedding_model, self.config.embedding_backend)
+        return np.asarray(encode_texts(model, text, normalize_embeddings=True), dtype=np.float32)
+    
+    def lookup(self, scope: str, text: str, run_id: Optional[str] = None,
+               threshold: Optional[float] = None) -> Optional[str]:
+        """Return the cached content most similar to text within scope, if close enough.
+        
+        Only the SEMANTIC_CACHE_MAX_ROWS newest live entries are compared, and
+        entries stored by run_id itself are skipped.
+        """
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                rows = conn.execute("""
+                    SELECT embedding, content FROM llm_semantic_cache 
+                    WHERE scope = ? AND created_at >= ? AND run_id IS NOT ?
+                    ORDER BY created_at DESC 
+                    LIMIT ?
+                """, (scope, int(time.time()) - self.ttl, run_id, SEMANTIC_CACHE_MAX_ROWS)).fetchall()
+            if not rows:
+                return None
+            
+            matrix = np.frombuffer(b"".join(row[0] for row in rows), dtype=np.float32).reshape(len(rows), -1)
+            similarities = matrix @ self._embed(text)
+            best = int(np.argmax(similarities))
+            minimum = self.threshold if threshold is None else threshold
+            return rows[best][1] if similarities[best] >= minimum else None
+        except Exception as e:
+            print(f"Error reading semantic LLM cache: {e}")
+            return None
+    
+    def store(self, scope: str, text: str, content: str, run_id: Optional[str] = None):
+        """Store response content under the embedding of text, pruning expired entries."""
+        try:
+            embedding = self._embed(text)
+            now = int(time.time())
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("DELETE FROM llm_semantic_cache WHERE created_at < ?", (now - self.ttl,))
+                conn.execute(
+                    "INSERT INTO llm_semantic_cache (scope, embedding, content, created_at, run_id) VALUES (?, ?, ?, ?, ?)",
+                    (scope, embedding.tobytes(), content, now, run_id)
                 )
-            return self._llm
+                conn.commit()
+        except Exception as e:
+            print(f"Error writing semantic LLM cache: {e}")
 
-def get_llm_provider(config: ResearchConfig) -> LLMProvider:
+class CachedLLMProvider(LLMProvider):
+    """Exact-match response cache around another LLM provider."""
+    
+    def __init__(self, provider: LLMProvider, db_path: str = LLM_CACHE_PATH, ttl: int = LLM_CACHE_TTL):
+        super().__init__(provider.config)
+        self.provider = provider
+        self.db_path = db_path
+        self.ttl = ttl
+        self.semantic_cache = SemanticLLMCache(provider.config, db_path, ttl)
+        # Identifies this provider's run, so it is never served its own semantic entries
+        self.run_id = uuid.uuid4().hex
+        self._init_database()
+    
+    def _init_database(self):
+        """Initialize SQLite table for cached responses."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    created_at INTEGER NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_time ON llm_cache(created_at)")
+            conn.commit()
+    
+    def _cache_key(self, messages, output_mode: str) -> str:
+        """Hash the model, output mode and messages into a cache key."""
+        payload = orjson.dumps({
+            "provider": self.config.llm_provider,
+            "model": self.config.local_llm,
+            "output_mode": output_mode,
+            "messages": [(m.type, m.content) for m in messages]
+        }, option=orjson.OPT_SORT_KEYS)
+        return hashlib.sha256(payload).hexdigest()
+    
+    def _lookup(self, key: str) -> Optional[str]:
+        """Return the cached content for a key if present and not expired."""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                row = conn.execute(
+                    "SELECT content FROM llm_cache WHERE key = ? AND created_at >= ?",
+                    (key, int(time.time()) - self.ttl)
+                ).fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            print(f"Error reading LLM cache: {e}")
+            return None
+    
+    def _store(self, key: str, content: str):
+        """Store response content under a key, pruning expired and surplus entries."""
+        try:
+            now = int(time.time())
+            with sqlite3.connect(self.db_path) as conn:
+                conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, content, created_at) VALUES (?, ?, ?)",
+                    (key, content, now)
+                )
+                conn.execute("""
+                    DELETE FROM llm_cache WHERE key IN (
+                        SELECT key FROM llm_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                    )
+                """, (LLM_CACHE_MAX_ROWS,))
+                conn.commit()
+        except Exception as e:
+            print(f"Error writing LLM cache: {e}")
+    
+    def get_llm(self, json_mode: bool = False):
+        """Get the wrapped provider's LLM instance."""
+        return self.provider.get_llm(json_mode=json_mode)
+    
+    def structured_output_errors(self) -> tuple:
+        """Get the wrapped provider's structured output errors."""
+        return self.provider.structured_output_errors()
+    
+    def _semantic_scope(self, scope: str, output_mode: str) -> str:
+        """Qualify a caller scope with the LLM, the embedding model and the output mode."""
+        return (
+            f"{self.config.llm_provider}:{self.config.local_llm}:"
+            f"{self.config.embedding_model}:{self.config.embedding_backend}:{output_mode}:{scope}"
+        )
+    
+    def invoke(self, messages, json_mode: bool = False,
+               semantic_scope: Optional[str] = None, semantic_text: Optional[str] = None,
+               structured_output: Optional[Type[BaseModel]] = None,
+               semantic_threshold: Optional[float] = None):
+        """Invoke the LLM, answering repeated prompts from the cache.
+        
+        When semantic_scope and semantic_text are given, an exact-match miss falls
+        back to the most similar semantic_text that another run answered in that
+        scope, at semantic_threshold similarity or above.
+        Structured outputs are cached as their JSON and re-validated on a hit.
+        """
+        output_mode = structured_output.__name__ if structured_output is not None else f"json={json_mode}"
+        key = self._cache_key(messages, output_mode)
+        content = self._lookup(key)
+        
+        use_semantic = semantic_scope is not None and semantic_text is not None
+        if use_semantic:
+            scope = self._semantic_scope(semantic_scope, output_mode)
+            if content is None:
+                content = self.semantic_cache.lookup(scope, semantic_text, self.run_id, semantic_threshold)
+        
+        if content is not None:
+            if structured_output is not None:
+                return structured_output.model_validate_json(content)
+            return AIMessage(content=content)
+        
+        result = self.provider.invoke(messages, json_mode=json_mode, structured_output=structured_output)
+        content = result.model_dump_json() if structured_output is not None else result.content
+        if isinstance(content, str):
+            self._store(key, content)
+            if use_semantic:
+                self.semantic_cache.store(scope, semantic_text, content, self.run_id)
+        return result
+
+    def invoke_stream(self, messages) -> Iterator[str]:
+        """Stream the LLM response, replaying a cached response as a single chunk."""
+        key = self._cache_key(messages, "json=False")
+        content = self._lookup(key)
+        if content is not None:
+            yield content
+            return
+        
+        chunks = []
+        for chunk in self.provider.invoke_stream(messages):
+            chunks.append(chunk)
+            yield chunk
+        self._store(key, "".join(chunks))
+
+def get_llm_provider(config: ResearchConfig, use_cache: bool = True) -> LLMProvider:
     """Get the appropriate LLM provider based on configuration."""
     if config.llm_provider == "lmstudio":
-        return LMStudioProvider(config)
+        provider = LMStudioProvider(config)
     else:  # Default to Ollama
-        return OllamaProvider(config)
+        provider = OllamaProvider(config)
+    return CachedLLMProvider(provider) if use_cache else provider
 
 def test_llm_connection(config: ResearchConfig) -> Dict[str, Any]:
     """Test LLM connection and return status."""
     try:
-        provider = get_llm_provider(config)
+        # Bypass the response cache so the server is actually reached
+        provider = get_llm_provider(config, use_cache=False)
         
-        # Test basic connection
+        # Test basic connection and JSON mode concurrently
         from langchain_core.messages import HumanMessage
-        response = provider.invoke([HumanMessage(content="Hello, respond with just 'OK'")])
-        
-        # Test JSON mode
-        json_response = provider.invoke(
-            [HumanMessage(content='Respond with JSON: {"status": "ok"}')], 
-            json_mode=True
-        )
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            basic_future = executor.submit(provider.invoke, [HumanMessage(content="Hello, respond with just 'OK'")])
+            json_future = executor.submit(
+                provider.invoke,
+                [HumanMessage(content='Respond with JSON: {"status": "ok"}')], 
+                json_mode=True
+            )
+            response, json_response = basic_future.result(), json_future.result()
         
         return {
             "status": "success",
@@ -1,20 +1,18 @@
 from datetime import datetime
+from string import Formatter
 
 def get_current_date():
     """Get current date in a readable format."""
     return datetime.now().strftime("%B %d, %Y")
 
-query_writer_instructions = """Your goal is to generate a targeted web search query.
+# System prompts are byte-identical across calls so servers can reuse their KV cache;
+# per-call values (date, topic, summary) go in the human message templates.
+query_writer_instructions = """Your goal is to generate a targeted web search query for the topic given by the user.
 
 <CONTEXT>
-Current date: {current_date}
-Please ensure your queries account for the most current information available as of this date.
+Please ensure your queries account for the most current information available as of the current date given by the user.
 </CONTEXT>
 
-<TOPIC>
-{research_topic}
-</TOPIC>
-
 <FORMAT>
 Format your response as a JSON object with ALL three of these exact keys:
    - "query": The actual search query string
@@ -23,14 +21,22 @@ Format your response as a JSON object with ALL three of these exact keys:
 
 <EXAMPLE>
 Example output:
-{{
+{
     "query": "machine learning transformer architecture explained",
     "rationale": "Understanding the fundamental structure of transformer models"
-}}
+}
 </EXAMPLE>
 
 Provide your response in JSON format:"""
 
+query_writer_input = """Current date: {current_date}
+
+<TOPIC>
+{research_topic}
+</TOPIC>
+
+Generate a query for web search:"""
+
 summarizer_instructions = """
 <GOAL>
 Generate a high-quality summary of the provided context.
@@ -61,7 +67,7 @@ Think carefully about the provided Context first. Then generate a summary of the
 </Task>
 """
 
-reflection_instructions = """You are an expert research assistant analyzing a summary about {research_topic}.
+reflection_instructions = """You are an expert research assistant analyzing a summary about the research topic given by the user.
 
 <GOAL>
 1. Identify knowledge gaps or areas that need deeper exploration
@@ -81,12 +87,37 @@ Format your response as a JSON object with these exact keys:
 
 <Task>
 Reflect carefully on the Summary to identify knowledge gaps and produce a follow-up query. Then, produce your output following this JSON format:
-{{
+{
     "knowledge_gap": "The summary lacks information about performance metrics and benchmarks",
     "follow_up_query": "What are typical performance benchmarks and metrics used to evaluate [specific technology]?"
-}}
+}
 </Task>
 
 Provide your analysis in JSON format:"""
 
+reflection_input = """<TOPIC>
+{research_topic}
+</TOPIC>
 
+Reflect on our existing knowledge:
+===
+{running_summary}
+===
+And now identify a knowledge gap and generate a follow-up web search query:"""
+
+def _compile_template(template: str):
+    """Parse a str.format template once and return a renderer taking the same keyword fields."""
+    parts = []
+    for literal, field, format_spec, conversion in Formatter().parse(template):
+        # Plain {field} substitution only; anything else would be silently dropped
+        if format_spec or conversion:
+            raise ValueError(f"Template field {{{field}}} uses a conversion or format spec")
+        parts.append((literal, field))
+    
+    def render(**values) -> str:
+        return "".join(literal + (str(values[field]) if field is not None else "") for literal, field in parts)
+    
+    return render
+
+render_query_writer_input = _compile_template(query_writer_input)
+render_reflection_input = _compile_template(reflection_input)
@@ -1,18 +1,36 @@
 import operator
 from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set
 from typing_extensions import Annotated
+from pydantic import BaseModel
 from datetime import datetime
+from itertools import accumulate
 
-@dataclass(kw_only=True)
+# Step order and weights for overall progress, with the total weight of the steps before each
+_STEP_ORDER = ("generate_query", "web_research", "summarize_sources", "reflect_on_summary", "finalize_summary")
+_STEP_WEIGHTS = {
+    "generate_query": 10.0,
+    "web_research": 40.0,
+    "summarize_sources": 25.0,
+    "reflect_on_summary": 15.0,
+    "finalize_summary": 10.0
+}
+_STEP_PREFIX = dict(zip(_STEP_ORDER, accumulate((_STEP_WEIGHTS[step] for step in _STEP_ORDER), initial=0.0)))
+
+def _keep_last(existing: List[str], new: List[str]) -> List[str]:
+    """Reducer keeping only the latest entry; summarization reads just the newest results."""
+    return new[-1:] if new else existing[-1:]
+
+@dataclass(kw_only=True, slots=True)
 class ResearchState:
     """State for the research workflow with progress tracking."""
     
     # Core research data
     research_topic: str = field(default=None)
     search_query: str = field(default=None)
-    web_research_results: Annotated[List[str], operator.add] = field(default_factory=list)
+    web_research_results: Annotated[List[str], _keep_last] = field(default_factory=list)
     sources_gathered: Annotated[List[str], operator.add] = field(default_factory=list)
+    sources_set: Set[str] = field(default_factory=set)  # URLs already in sources_gathered
     research_loop_count: int = field(default=0)
     running_summary: str = field(default=None)
     
@@ -36,42 +54,20 @@ class ResearchState:
         if self.current_step == "idle":
             return 0.0
         
-        # Define step order and weights
-        step_order = ["generate_query", "web_research", "summarize_sources", "reflect_on_summary", "finalize_summary"]
-        step_weights = {
-            "generate_query": 10.0,
-            "web_research": 40.0,
-            "summarize_sources": 25.0,
-            "reflect_on_summary": 15.0,
-            "finalize_summary": 10.0
-        }
-        
-        # Calculate progress based on completed steps
-        completed_progress = 0.0
-        current_step_index = -1
-        
-        try:
-            current_step_index = step_order.index(self.current_step)
-        except ValueError:
-            # If current step is not in the list, assume it's completed
+        # Unknown steps (e.g. error) are treated as completed
+        completed_progress = _STEP_PREFIX.get(self.current_step)
+        if completed_progress is None:
             return 100.0
         
-        # Add progress from completed steps
-        for i in range(current_step_index):
-            completed_progress += step_weights[step_order[i]]
-        
         # Add progress from current step
-        current_step_progress = step_weights.get(self.current_step, 0.0) * self.step_progress
+        current_step_progress = _STEP_WEIGHTS[self.current_step] * self.step_progress
         
         total_progress = completed_progress + current_step_progress
         
-        # Factor in research loops for web research steps
-        if self.current_step in ["web_research", "summarize_sources", "reflect_on_summary"]:
-            # Adjust progress based on research loops
+        # Scale web research progress by loop progress
+        if self.current_step == "web_research":
             loop_factor = min(1.0, self.research_loop_count / max(1, self.total_steps))
-            if self.current_step == "web_research":
-                # Scale web research progress by loop progress
-                total_progress = 10.0 + (40.0 * loop_factor) + current_step_progress
+            total_progress = 10.0 + (40.0 * loop_factor) + current_step_progress
         
         return min(100.0, total_progress)
     
@@ -93,12 +89,12 @@ class ResearchState:
         self.error_message = error_message
         self.current_step = "error"
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class ResearchStateInput:
     """Input state for starting research."""
     research_topic: str = field(default=None)
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class ResearchStateOutput:
     """Output state after research completion."""
     running_summary: str = field(default=None)
@@ -106,7 +102,17 @@ class ResearchStateOutput:
     research_topic: str = field(default=None)
     session_id: str = field(default=None)
 
-@dataclass
+class QueryOutput(BaseModel):
+    """Structured LLM output for search query generation."""
+    query: str
+    rationale: str = ""
+
+class ReflectionOutput(BaseModel):
+    """Structured LLM output for reflecting on the running summary."""
+    knowledge_gap: str = ""
+    follow_up_query: str = ""
+
+@dataclass(slots=True)
 class ResearchSession:
     """Complete research session with metadata."""
     
@@ -1,12 +1,14 @@
 import os
 import httpx
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Union, Optional
 
 from markdownify import markdownify
-from tavily import TavilyClient
-from duckduckgo_search import DDGS
-from langchain_community.utilities import SearxSearchWrapper
+
+# Full-page fetches are network-bound, so each result page is fetched concurrently
+FETCH_MAX_WORKERS = 8
+_fetch_executor = ThreadPoolExecutor(max_workers=FETCH_MAX_WORKERS, thread_name_prefix="page-fetch")
 
 def get_config_value(value: Any) -> str:
     """
@@ -148,6 +150,17 @@ def fetch_raw_content(url: str) -> Optional[str]:
         print(f"Warning: Failed to fetch full page content for {url}: {str(e)}")
         return None
 
+def fetch_raw_contents(results: List[Dict[str, Any]]) -> None:
+    """
+    Fill in the raw_content of each search result by fetching the pages concurrently.
+    
+    Args:
+        results (List[Dict[str, Any]]): Search result dictionaries with a 'url' key,
+                                        updated in place
+    """
+    for result, raw_content in zip(results, _fetch_executor.map(fetch_raw_content, [r['url'] for r in results])):
+        result['raw_content'] = raw_content
+
 def duckduckgo_search(query: str, max_results: int = 3, fetch_full_page: bool = False) -> Dict[str, List[Dict[str, Any]]]:
     """
     Search the web using DuckDuckGo and return formatted results.
@@ -168,6 +181,9 @@ def duckduckgo_search(query: str, max_results: int = 3, fetch_full_page: bool =
                 - raw_content (str or None): Full page content if fetch_full_page is True,
                                             otherwise same as content
     """
+    # Search backends are imported on use; only the configured one is ever needed
+    from duckduckgo_search import DDGS
+    
     try:
         with DDGS() as ddgs:
             results = []
@@ -182,19 +198,18 @@ def duckduckgo_search(query: str, max_results: int = 3, fetch_full_page: bool =
                     print(f"Warning: Incomplete result from DuckDuckGo: {r}")
                     continue
 
-                raw_content = content
-                if fetch_full_page:
-                    raw_content = fetch_raw_content(url)
-                
                 # Add result to list
                 result = {
                     "title": title,
                     "url": url,
                     "content": content,
-                    "raw_content": raw_content
+                    "raw_content": content
                 }
                 results.append(result)
             
+            if fetch_full_page:
+                fetch_raw_contents(results)
+            
             return {"results": results}
     except Exception as e:
         print(f"Error in DuckDuckGo search: {str(e)}")
@@ -224,6 +239,8 @@ def searxng_search(query: str, max_results: int = 3, fetch_full_page: bool = Fal
                 - raw_content (str or None): Full page content if fetch_full_page is True,
                                            otherwise same as content
     """
+    from langchain_community.utilities import SearxSearchWrapper
+    
     host=os.environ.get("SEARXNG_URL", "http://localhost:8888")
     s = SearxSearchWrapper(searx_host=host)
 
@@ -238,18 +255,17 @@ def searxng_search(query: str, max_results: int = 3, fetch_full_page: bool = Fal
             print(f"Warning: Incomplete result from SearXNG: {r}")
             continue
 
-        raw_content = content
-        if fetch_full_page:
-            raw_content = fetch_raw_content(url)
-        
         # Add result to list
         result = {
             "title": title,
             "url": url,
             "content": content,
-            "raw_content": raw_content
+            "raw_content": content
         }
         results.append(result)
+    
+    if fetch_full_page:
+        fetch_raw_contents(results)
     return {"results": results}
     
 def tavily_search(query: str, fetch_full_page: bool = True, max_results: int = 3) -> Dict[str, List[Dict[str, Any]]]:
@@ -275,6 +291,8 @@ def tavily_search(query: str, fetch_full_page: bool = True, max_results: int = 3
                                             fetch_full_page is True
     """
      
+    from tavily import TavilyClient
+    
     tavily_client = TavilyClient()
     return tavily_client.search(query, 
                          max_results=max_results, 
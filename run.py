@@ -7,21 +7,25 @@ This script provides a simple way to launch the application with proper configur
 import os
 import sys
 import subprocess
+from importlib.metadata import distribution, PackageNotFoundError
 from pathlib import Path
 
+# Distributions checked at startup; only their metadata is read, the packages
+# themselves are imported later by the Streamlit process
+REQUIRED_DISTRIBUTIONS = ("streamlit", "langchain-ollama", "sentence-transformers", "duckduckgo-search")
+
 def check_dependencies():
     """Check if all required dependencies are installed."""
-    try:
-        import streamlit
-        import langchain_ollama
-        import sentence_transformers
-        import duckduckgo_search
-        print("✅ All dependencies are installed")
-        return True
-    except ImportError as e:
-        print(f"❌ Missing dependency: {e}")
-        print("Please run: pip install -r requirements.txt")
-        return False
+    for name in REQUIRED_DISTRIBUTIONS:
+        try:
+            distribution(name)
+        except PackageNotFoundError:
+            print(f"❌ Missing dependency: {name}")
+            print("Please run: pip install -r requirements.txt")
+            return False
+    
+    print("✅ All dependencies are installed")
+    return True
 
 def check_environment():
     """Check if environment is properly configured."""
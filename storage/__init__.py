@@ -1,7 +1,8 @@
 """Storage module for Streamlit Deep Researcher."""
 
-from .vector_store import VectorStore, create_vector_store
+from .encoder import get_encoder, encode_texts, backend_fallback_reason
+from .vector_store import VectorStore, SessionPreview, create_vector_store
 
-__all__ = ["VectorStore", "create_vector_store"]
+__all__ = ["VectorStore", "SessionPreview", "create_vector_store", "get_encoder", "encode_texts", "backend_fallback_reason"]
 
 # Enhanced functionality
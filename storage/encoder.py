@@ -0,0 +1,108 @@
+import os
+
+# Let the BLAS/OpenMP pools use every core; must be set before torch is imported
+os.environ.setdefault("OMP_NUM_THREADS", str(os.cpu_count() or 1))
+
+import threading
+from functools import lru_cache
+from importlib.util import find_spec
+from typing import Dict, Optional, Tuple
+import torch
+from sentence_transformers import SentenceTransformer
+
+# Prequantized int8 ONNX weights (VNNI dot-product kernels), published by many sentence-transformers models
+QUANTIZED_ONNX_FILE = "onnx/model_qint8_avx512_vnni.onnx"
+# Where int8 ONNX exports are cached for models that do not publish one
+ONNX_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "research_agent", "onnx")
+
+# Threads torch uses to run independent ops side by side
+TORCH_INTEROP_THREADS = 2
+
+# Packages installed by the sentence-transformers extra each backend needs
+BACKEND_EXTRAS = {
+    "onnx": ("onnxruntime", "optimum"),
+    "openvino": ("openvino", "optimum"),
+}
+
+# Loaded models kept at once; matches the app's vector store cache (max_entries=4),
+# so sessions with different embedding settings do not evict each other's model
+ENCODER_CACHE_SIZE = 4
+
+_encoder_lock = threading.Lock()
+# Why a requested backend fell back to torch, by (model, backend)
+_backend_fallbacks: Dict[Tuple[str, str], str] = {}
+
+def _missing_extra(backend: str) -> Optional[str]:
+    """Describe the missing install for a backend, if its packages are not importable."""
+    if any(find_spec(name) is None for name in BACKEND_EXTRAS.get(backend, ())):
+        return f'pip install "sentence-transformers[{backend}]"'
+    return None
+
+def backend_fallback_reason(model_name: str, backend: str) -> Optional[str]:
+    """Explain why embeddings for this model and backend run on torch instead, if they do."""
+    missing = _missing_extra(backend)
+    if missing:
+        return f"the {backend} backend is not installed ({missing})"
+    return _backend_fallbacks.get((model_name, backend))
+
+def _configure_torch():
+    """Run torch inference on every core."""
+    torch.set_num_threads(os.cpu_count() or 1)
+    try:
+        torch.set_num_interop_threads(TORCH_INTEROP_THREADS)
+    except RuntimeError:
+        # Only allowed before the first parallel op; keep the current pool
+        pass
+
+def _load_quantized_onnx(model_name: str) -> SentenceTransformer:
+    """Load int8 ONNX weights, exporting and quantizing them once if the model has none."""
+    try:
+        return SentenceTransformer(model_name, backend="onnx", model_kwargs={"file_name": QUANTIZED_ONNX_FILE})
+    except Exception:
+        pass
+    
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+    
+    export_dir = os.path.join(ONNX_CACHE_DIR, model_name.replace("/", "__"))
+    if not os.path.exists(os.path.join(export_dir, QUANTIZED_ONNX_FILE)):
+        model = SentenceTransformer(model_name, backend="onnx")
+        model.save_pretrained(export_dir)
+        export_dynamic_quantized_onnx_model(model, "avx512_vnni", export_dir)
+    return SentenceTransformer(export_dir, backend="onnx", model_kwargs={"file_name": QUANTIZED_ONNX_FILE})
+
+@lru_cache(maxsize=ENCODER_CACHE_SIZE)
+def _load_encoder(model_name: str, backend: str) -> SentenceTransformer:
+    """Load a sentence transformer model on CPU with the requested backend."""
+    if backend in BACKEND_EXTRAS and _missing_extra(backend):
+        print(f"Embedding backend {backend} is not installed, using torch: {_missing_extra(backend)}")
+    elif backend == "onnx":
+        try:
+            return _load_quantized_onnx(model_name)
+        except Exception as e:
+            print(f"Error loading ONNX embedding model, falling back to torch: {e}")
+            _backend_fallbacks[(model_name, backend)] = f"loading the ONNX model failed: {e}"
+    elif backend == "openvino":
+        try:
+            return SentenceTransformer(model_name, backend="openvino")
+        except Exception as e:
+            print(f"Error loading OpenVINO embedding model, falling back to torch: {e}")
+            _backend_fallbacks[(model_name, backend)] = f"loading the OpenVINO model failed: {e}"
+    
+    _configure_torch()
+    try:
+        # Move model to CPU to avoid meta tensor issues
+        return SentenceTransformer(model_name).to('cpu').eval()
+    except Exception as e:
+        print(f"Error loading embedding model: {e}")
+        # Fallback to a simpler model
+        return SentenceTransformer('all-MiniLM-L6-v2').to('cpu').eval()
+
+def get_encoder(model_name: str = "all-MiniLM-L6-v2", backend: str = "torch") -> SentenceTransformer:
+    """Get the process-wide sentence transformer, shared by the vector store and LLM cache."""
+    with _encoder_lock:
+        return _load_encoder(model_name, backend)
+
+def encode_texts(model: SentenceTransformer, texts, **kwargs):
+    """Encode text(s) without building an autograd graph."""
+    with torch.inference_mode():
+        return model.encode(texts, **kwargs)
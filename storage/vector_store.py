@@ -1,45 +1,161 @@
 import os
 import json
+import hashlib
 import sqlite3
+import struct
+import threading
 import numpy as np
+import orjson
+from cachetools import LRUCache
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
 from typing import List, Dict, Any, Optional, Tuple
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 from datetime import datetime
 
 from config.settings import ResearchConfig
 from research.state import ResearchSession
+from storage.encoder import get_encoder, encode_texts
+
+# Below this many sessions an exact scan is cheaper than maintaining an ANN index
+ANN_MIN_SESSIONS = 1000
+# Number of nearest IVF partitions scanned per query
+IVF_NPROBE = 3
+# Rebuild the ANN index once unindexed plus deleted rows exceed this fraction of indexed sessions
+ANN_REBUILD_RATIO = 0.1
+# Retrain the IVF centroids once the index has grown by this factor since training
+ANN_RETRAIN_GROWTH = 2.0
+# Sessions added to the ANN index in place before it is written to disk again; unsaved
+# rows are picked up as unindexed rows (or trigger a rebuild) after a crash
+ANN_SAVE_EVERY = 50
+# From this many sessions the index stores 8-bit scalar-quantized vectors instead of float32
+IVF_SQ8_MIN_SESSIONS = 20000
+# Exact scans over more rows than this are prefiltered by Hamming distance on sign bits;
+# smaller collections are always scanned exactly so no neighbour is dropped
+BINARY_PREFILTER_MIN = ANN_MIN_SESSIONS
+# Number of Hamming (and IVF) candidates kept per requested result for exact reranking
+BINARY_RERANK_FACTOR = 4
+# Fewest candidates kept for reranking, however small the requested limit
+RERANK_SHORTLIST_MIN = 256
+
+# Set bits per byte value, for Hamming distance over packed sign codes
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+# Stored embedding format; rows without a dtype hold raw float32
+EMBEDDING_DTYPE = "int8"
+
+# Texts per forward pass when embedding several sessions at once
+ENCODE_BATCH_SIZE = 32
+# Sessions with less text than this are stored without an embedding
+MIN_EMBED_CHARS = 32
+# Distinct search queries whose embeddings are kept per store
+QUERY_EMBEDDING_CACHE_SIZE = 256
+
+# Applied once to the store's long-lived connection: WAL lets searches read while a session is written
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+)
+
+# Characters of summary kept in history previews (a few extra to detect truncation)
+PREVIEW_SUMMARY_CHARS = 100
+
+@dataclass(slots=True)
+class SessionPreview:
+    """Lightweight view of a research session for history listings."""
+    
+    id: str
+    topic: str
+    summary_preview: str
+    source_count: int
+    created_at: datetime
 
 class VectorStore:
     """Local vector store for research sessions using SQLite and sentence transformers."""
     
-    def __init__(self, config: ResearchConfig, db_path: str = "research_history.db"):
+    def __init__(self, config: ResearchConfig, db_path: str = "research_history.db",
+                 encoder: Optional[SentenceTransformer] = None):
         self.config = config
         self.db_path = db_path
-        self.model = None
+        self.index_path = f"{db_path}.ann"
+        self.vectors_path = f"{db_path}.vectors.npy"
+        self.model = encoder  # defaults to the shared encoder for config.embedding_model
+        self._embeddings = None  # (version, ids, normalized matrix, packed sign codes), loaded lazily
+        self._index = None
+        self._index_ids: List[str] = []  # session ID per index label; append-only until rebuilt
+        self._index_trained_size = 0
+        self._index_unsaved = 0  # sessions added to the index since it was last saved
+        # Per-store cache, since the encoder is fixed for the store's lifetime; a plain
+        # dict-like cache, unlike lru_cache on a bound method, holds no reference back to the store
+        self._query_embeddings = LRUCache(maxsize=QUERY_EMBEDDING_CACHE_SIZE)
+        # One connection for the store's lifetime, shared by the UI and persistence threads
+        self._lock = threading.RLock()
+        self._conn = self._connect()
         self._init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open the store's connection and apply the performance pragmas."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for pragma in SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def close(self):
+        """Save pending ANN index additions and close the store's database connection."""
+        with self._lock:
+            if self._index is not None and self._index_unsaved:
+                self._save_index()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    def __del__(self):
+        """Release the connection when the store is garbage collected."""
+        try:
+            self.close()
+        except Exception:
+            pass
+    
     def _get_model(self) -> SentenceTransformer:
-        """Lazy load the sentence transformer model."""
-        if self.model is None:
-            try:
-                self.model = SentenceTransformer(self.config.embedding_model)
-                # Move model to CPU to avoid meta tensor issues
-                self.model = self.model.to('cpu')
-            except Exception as e:
-                print(f"Error loading embedding model: {e}")
-                # Fallback to a simpler model
-                self.model = SentenceTransformer('all-MiniLM-L6-v2')
-                self.model = self.model.to('cpu')
-        return self.model
+        """Get the injected encoder or the shared one for the configured model."""
+        if self.model is not None:
+            return self.model
+        return get_encoder(self.config.embedding_model, self.config.embedding_backend)
+    
+    def _embed_query(self, query: str) -> np.ndarray:
+        """Embed a search query as a normalized float32 vector, reusing recent queries."""
+        with self._lock:
+            embedding = self._query_embeddings.get(query)
+        if embedding is None:
+            embedding = np.asarray(
+                encode_texts(self._get_model(), query, convert_to_numpy=True, normalize_embeddings=True),
+                dtype=np.float32
+            )
+            # Shared by later searches for the same query, so it must not be modified
+            embedding.flags.writeable = False
+            with self._lock:
+                self._query_embeddings[query] = embedding
+        return embedding
     
     def _init_database(self):
         """Initialize SQLite database with tables for research sessions."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
             
-            # Create research sessions table
-            cursor.execute("""
+            # Databases created before int8 storage or content hashing lack those columns
+            cursor.execute("PRAGMA table_info(research_sessions)")
+            columns = {row[1] for row in cursor.fetchall()}
+            for column in ("embedding_dtype", "content_sha1"):
+                if columns and column not in columns:
+                    cursor.execute(f"ALTER TABLE research_sessions ADD COLUMN {column} TEXT")
+            
+            # Create the schema in one script and one transaction
+            cursor.executescript("""
+                BEGIN;
+                
                 CREATE TABLE IF NOT EXISTS research_sessions (
                     id TEXT PRIMARY KEY,
                     topic TEXT NOT NULL,
@@ -48,53 +164,391 @@ class VectorStore:
                     created_at TEXT NOT NULL,
                     completed_at TEXT,
                     config TEXT,  -- JSON object
-                    embedding BLOB  -- Numpy array as bytes
-                )
-            """)
-            
-            # Create index on created_at for faster queries
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_created_at 
-                ON research_sessions(created_at)
+                    embedding BLOB,  -- Numpy array as bytes
+                    embedding_dtype TEXT,  -- 'int8' (float32 scale + int8 codes), NULL for float32
+                    content_sha1 TEXT  -- Hash of the embedding model, backend and text, to reuse embeddings
+                );
+                
+                -- Index on created_at for faster queries; id breaks ties in the cleanup order
+                DROP INDEX IF EXISTS idx_created_at;
+                CREATE INDEX IF NOT EXISTS idx_created_at_id ON research_sessions(created_at, id);
+                CREATE INDEX IF NOT EXISTS idx_content_sha1 ON research_sessions(content_sha1);
+                
+                -- Version counter bumped on every write, used to validate cached embeddings
+                CREATE TABLE IF NOT EXISTS store_meta (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+                
+                COMMIT;
             """)
-            
-            conn.commit()
+    
+    @contextmanager
+    def bulk_mode(self):
+        """Skip fsyncs during bulk writes; a crash may lose them but cannot corrupt the WAL store."""
+        with self._lock:
+            previous = self._conn.execute("PRAGMA synchronous").fetchone()[0]
+            self._conn.execute("PRAGMA synchronous=OFF")
+            try:
+                yield
+            finally:
+                self._conn.execute(f"PRAGMA synchronous={previous}")
+    
+    def _bump_version(self, cursor: sqlite3.Cursor):
+        """Record that the stored sessions changed."""
+        cursor.execute("""
+            INSERT INTO store_meta (key, value) VALUES ('embeddings_version', 1)
+            ON CONFLICT(key) DO UPDATE SET value = value + 1
+        """)
+    
+    def _get_version(self, cursor: sqlite3.Cursor) -> int:
+        """Get the current embeddings version."""
+        cursor.execute("SELECT value FROM store_meta WHERE key = 'embeddings_version'")
+        row = cursor.fetchone()
+        return row[0] if row else 0
     
     def _serialize_embedding(self, embedding: np.ndarray) -> bytes:
-        """Serialize numpy array to bytes for storage."""
-        return embedding.tobytes()
+        """Quantize a unit-length embedding to int8 codes with one float32 scale (4 + D bytes)."""
+        scale = max(float(np.abs(embedding).max()) / 127.0, 1e-12)
+        codes = np.clip(np.round(embedding / scale), -127, 127).astype(np.int8)
+        return struct.pack('<f', scale) + codes.tobytes()
     
-    def _deserialize_embedding(self, embedding_bytes: bytes) -> np.ndarray:
-        """Deserialize bytes back to numpy array."""
+    def _deserialize_embedding(self, embedding_bytes: bytes, dtype: Optional[str] = None) -> np.ndarray:
+        """Deserialize bytes back to a float32 numpy array."""
+        if dtype == EMBEDDING_DTYPE:
+            scale = struct.unpack_from('<f', embedding_bytes)[0]
+            return np.frombuffer(embedding_bytes, dtype=np.int8, offset=4).astype(np.float32) * scale
         return np.frombuffer(embedding_bytes, dtype=np.float32)
     
+    def _row_to_session(self, row: tuple) -> ResearchSession:
+        """Build a session from an (id, topic, summary, sources, created_at, completed_at, config) row."""
+        return ResearchSession(
+            id=row[0],
+            topic=row[1],
+            summary=row[2],
+            sources=orjson.loads(row[3]),
+            created_at=datetime.fromisoformat(row[4]),
+            completed_at=datetime.fromisoformat(row[5]) if row[5] else None,
+            config=orjson.loads(row[6]) if row[6] else None
+        )
+    
+    def _load_embeddings(self) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """Load all session embeddings as L2-normalized rows of one float32 matrix.
+        
+        The matrix is cached in memory and in a memory-mapped ``.npy`` sidecar,
+        both tagged with the store version so they are reused until a write.
+        Alongside the matrix, each row's sign bits are packed into a binary code
+        (D/8 bytes) used to prefilter large scans by Hamming distance.
+        """
+        with self._lock, self._conn as conn:
+            cursor = conn.cursor()
+            # One read transaction, so the version, row count and rows come from a
+            # single snapshot even while other connections write
+            cursor.execute("BEGIN")
+            version = self._get_version(cursor)
+            
+            if self._embeddings is not None and self._embeddings[0] == version:
+                return self._embeddings[1:]
+            
+            loaded = self._load_vectors_file(version)
+            if loaded is not None:
+                ids, matrix = loaded
+            else:
+                # Stream the rows into one preallocated matrix instead of materializing them all
+                cursor.execute("SELECT COUNT(*) FROM research_sessions WHERE embedding IS NOT NULL")
+                count = cursor.fetchone()[0]
+                ids = [None] * count
+                matrix = np.empty((count, self.config.embedding_dimension), dtype=np.float32)
+                
+                cursor.execute("""
+                    SELECT id, embedding, embedding_dtype FROM research_sessions 
+                    WHERE embedding IS NOT NULL
+                    ORDER BY created_at
+                """)
+                for i, (session_id, embedding, dtype) in enumerate(cursor):
+                    vector = self._deserialize_embedding(embedding, dtype)
+                    if i == 0 and len(vector) != matrix.shape[1]:
+                        # Stored by a model whose width differs from the configured dimension
+                        matrix = np.empty((count, len(vector)), dtype=np.float32)
+                    ids[i] = session_id
+                    matrix[i] = vector
+                
+                # Quantized rows, and rows stored before insert-time normalization, need it here
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                matrix /= np.maximum(norms, 1e-12)
+                self._save_vectors_file(version, ids, matrix)
+            
+            self._embeddings = (version, ids, matrix, np.packbits(matrix > 0, axis=1))
+            return self._embeddings[1:]
+    
+    def _append_embeddings(self, previous_version: int, session_ids: List[str], embeddings: np.ndarray):
+        """Extend the cached matrix with new rows instead of reloading it on the next search."""
+        # Cache, sidecar and index change together, never alongside a search or rebuild
+        with self._lock:
+            cached = self._embeddings
+            if cached is None:
+                return
+            
+            version, ids, matrix, codes = cached
+            if (version != previous_version or len(set(session_ids)) != len(session_ids)
+                    or not set(session_ids).isdisjoint(ids)):
+                # Another writer got in between, or a row was replaced: reload lazily
+                self._embeddings = None
+                return
+            
+            # Sessions stored without an embedding still advance the version
+            embeddings = embeddings.reshape(len(session_ids), matrix.shape[1])
+            self._embeddings = (
+                previous_version + 1,
+                ids + session_ids,
+                np.vstack([matrix, embeddings]),
+                np.vstack([codes, np.packbits(embeddings > 0, axis=1)])
+            )
+            self._append_vectors_file(previous_version, self._embeddings[1], embeddings)
+            
+            # IVF assignment of a few vectors is cheap, so the index grows in place too
+            if self._index is not None and session_ids:
+                try:
+                    start = len(self._index_ids)
+                    labels = np.arange(start, start + len(session_ids), dtype=np.int64)
+                    self._index.add_with_ids(embeddings.astype(np.float32), labels)
+                    self._index_ids.extend(session_ids)
+                    # Rewriting the whole index per session would be O(N) I/O, so save in batches
+                    self._index_unsaved += len(session_ids)
+                    if self._index_unsaved >= ANN_SAVE_EVERY:
+                        self._save_index()
+                except Exception as e:
+                    print(f"Error adding to ANN index: {e}")
+    
+    def _load_vectors_file(self, version: int) -> Optional[Tuple[List[str], np.ndarray]]:
+        """Memory-map the embeddings sidecar if it matches the store version."""
+        try:
+            with open(f"{self.vectors_path}.json") as f:
+                meta = json.load(f)
+            if meta["version"] != version:
+                return None
+            matrix = np.load(self.vectors_path, mmap_mode='r')
+            if matrix.shape[0] != len(meta["ids"]):
+                return None
+            return meta["ids"], matrix
+        except (OSError, ValueError, KeyError):
+            return None
+    
+    def _save_vectors_file(self, version: int, ids: List[str], matrix: np.ndarray):
+        """Write the normalized embedding matrix to its sidecar files."""
+        try:
+            tmp_path = f"{self.vectors_path}.tmp.npy"
+            np.save(tmp_path, np.ascontiguousarray(matrix, dtype=np.float32))
+            os.replace(tmp_path, self.vectors_path)
+            with open(f"{self.vectors_path}.json", "w") as f:
+                json.dump({"version": version, "ids": ids}, f)
+        except OSError as e:
+            print(f"Error writing embeddings sidecar: {e}")
+    
+    def _append_vectors_file(self, previous_version: int, ids: List[str], embeddings: np.ndarray):
+        """Append new rows to the embeddings sidecar in place so warm starts stay valid.
+        
+        Only the rows and the shape in the ``.npy`` header are written; numpy pads
+        the header so the row count can grow without moving the data. Any mismatch
+        leaves the sidecar stale, and the next cold load rewrites it from SQLite.
+        """
+        try:
+            with open(f"{self.vectors_path}.json") as f:
+                meta = json.load(f)
+            if meta["version"] != previous_version:
+                return
+            
+            with open(self.vectors_path, "r+b") as f:
+                format_version = np.lib.format.read_magic(f)
+                if format_version == (1, 0):
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+                else:
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+                header_size = f.tell()
+                rows = len(ids) - len(embeddings)
+                if (fortran_order or dtype != np.float32 or len(shape) != 2
+                        or shape[0] != rows or shape[1] != embeddings.shape[1]):
+                    return
+                
+                f.seek(header_size + rows * shape[1] * 4)
+                f.write(np.ascontiguousarray(embeddings, dtype=np.float32).tobytes())
+                f.truncate()
+                
+                header = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False,
+                          "shape": (len(ids), shape[1])}
+                f.seek(0)
+                if format_version == (1, 0):
+                    np.lib.format.write_array_header_1_0(f, header)
+                else:
+                    np.lib.format.write_array_header_2_0(f, header)
+                if f.tell() != header_size:
+                    # Header outgrew its padding: the data no longer lines up
+                    raise ValueError("embeddings sidecar header changed size")
+            
+            with open(f"{self.vectors_path}.json", "w") as f:
+                json.dump({"version": previous_version + 1, "ids": ids}, f)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error appending to embeddings sidecar: {e}")
+    
+    def _build_index(self, ids: List[str], matrix: np.ndarray):
+        """Build an IVF index over the embeddings and persist it next to the database.
+        
+        Embeddings are clustered by k-means into sqrt(N) partitions; queries then
+        only scan the IVF_NPROBE partitions whose centroids are nearest. Large
+        collections store 8-bit codes in the partitions, since candidates are
+        rescored exactly against the embedding matrix anyway.
+        """
+        import faiss
+        
+        n, dimension = matrix.shape
+        # k-means wants roughly 39 training points per centroid
+        nlist = max(1, min(int(np.sqrt(n)), n // 39))
+        factory = f"IVF{nlist},SQ8" if n >= IVF_SQ8_MIN_SESSIONS else f"IVF{nlist},Flat"
+        
+        vectors = np.ascontiguousarray(matrix, dtype=np.float32)
+        index = faiss.index_factory(dimension, factory, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+        # Labels are positions in _index_ids, so later adds and deletes never renumber them
+        index.add_with_ids(vectors, np.arange(n, dtype=np.int64))
+        index.nprobe = IVF_NPROBE
+        
+        self._index = index
+        self._index_ids = list(ids)
+        self._index_trained_size = n
+        self._save_index()
+    
+    def _save_index(self):
+        """Persist the ANN index and its label-to-session mapping."""
+        import faiss
+        
+        try:
+            faiss.write_index(self._index, self.index_path)
+            with open(f"{self.index_path}.ids", "w") as f:
+                json.dump({"ids": self._index_ids, "trained_size": self._index_trained_size}, f)
+            self._index_unsaved = 0
+        except (OSError, RuntimeError) as e:
+            print(f"Error writing ANN index: {e}")
+    
+    def _get_index(self, ids: List[str], matrix: np.ndarray) -> Tuple[Optional[Any], List[int]]:
+        """Get the ANN index and the rows it does not cover, rebuilding it when stale (caller holds the lock)."""
+        if len(ids) < ANN_MIN_SESSIONS:
+            return None, []
+        
+        if self._index is None and os.path.exists(self.index_path):
+            try:
+                import faiss
+                index = faiss.read_index(self.index_path)
+                with open(f"{self.index_path}.ids") as f:
+                    meta = json.load(f)
+                if index.d == matrix.shape[1] and index.ntotal == len(meta["ids"]):
+                    faiss.extract_index_ivf(index).nprobe = IVF_NPROBE
+                    self._index = index
+                    self._index_ids = meta["ids"]
+                    self._index_trained_size = meta["trained_size"]
+            except Exception as e:
+                print(f"Error loading ANN index: {e}")
+        
+        indexed = set(self._index_ids)
+        tail_rows = [i for i, session_id in enumerate(ids) if session_id not in indexed]
+        stale_size = len(indexed) - (len(ids) - len(tail_rows))
+        if (self._index is None
+                or len(tail_rows) + stale_size > ANN_REBUILD_RATIO * len(self._index_ids)
+                or len(self._index_ids) > ANN_RETRAIN_GROWTH * self._index_trained_size):
+            self._build_index(ids, matrix)
+            tail_rows = []
+        
+        return self._index, tail_rows
+    
     def add_session(self, session: ResearchSession) -> bool:
         """Add a research session to the vector store."""
+        return self.add_sessions([session])
+    
+    def _find_embeddings(self, hashes: List[str]) -> Dict[str, Tuple[bytes, Optional[str]]]:
+        """Get stored (embedding, dtype) pairs for already-embedded texts by content hash."""
+        if not hashes:
+            return {}
+        
+        placeholders = ",".join("?" * len(hashes))
+        with self._lock, self._conn as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT content_sha1, embedding, embedding_dtype FROM research_sessions 
+                WHERE content_sha1 IN ({placeholders}) AND embedding IS NOT NULL
+            """, hashes)
+            return {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+    
+    def add_sessions(self, sessions: List[ResearchSession]) -> bool:
+        """Add research sessions to the vector store with one batched encode and insert."""
+        if not sessions:
+            return True
+        
         try:
-            # Generate embedding for the topic and summary
-            model = self._get_model()
-            text_to_embed = f"{session.topic}\n\n{session.summary}"
-            embedding = model.encode(text_to_embed, convert_to_numpy=True)
+            texts = [f"{s.topic}\n\n{s.summary}".strip() for s in sessions]
+            # Embeddings are only reusable from the same model and backend
+            encoder_key = f"{self.config.embedding_model}\n{self.config.embedding_backend}\n"
+            hashes = [hashlib.sha1((encoder_key + text).encode()).hexdigest() for text in texts]
             
-            # Store in database
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT OR REPLACE INTO research_sessions 
-                    (id, topic, summary, sources, created_at, completed_at, config, embedding)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
+            # Too little text to embed meaningfully: stored without an embedding,
+            # which searches already skip
+            embedded = [i for i, text in enumerate(texts) if len(text) >= MIN_EMBED_CHARS]
+            
+            # Reuse embeddings of identical text, then encode the rest in one batch
+            blobs = self._find_embeddings(sorted({hashes[i] for i in embedded}))
+            vectors: Dict[str, np.ndarray] = {}
+            for content_hash, (blob, dtype) in blobs.items():
+                vector = self._deserialize_embedding(blob, dtype)
+                vectors[content_hash] = vector / max(float(np.linalg.norm(vector)), 1e-12)
+            
+            pending = list(dict.fromkeys(hashes[i] for i in embedded if hashes[i] not in blobs))
+            if pending:
+                text_of = {hashes[i]: texts[i] for i in embedded}
+                encoded = encode_texts(
+                    self._get_model(), [text_of[h] for h in pending], batch_size=ENCODE_BATCH_SIZE,
+                    convert_to_numpy=True, normalize_embeddings=True
+                )
+                encoded = np.asarray(encoded, dtype=np.float32).reshape(len(pending), -1)
+                for content_hash, vector in zip(pending, encoded):
+                    vectors[content_hash] = vector
+                    blobs[content_hash] = (self._serialize_embedding(vector), EMBEDDING_DTYPE)
+            
+            rows = []
+            for i, session in enumerate(sessions):
+                blob, dtype = blobs[hashes[i]] if hashes[i] in vectors else (None, None)
+                rows.append((
                     session.id,
                     session.topic,
                     session.summary,
-                    json.dumps(session.sources),
+                    orjson.dumps(session.sources).decode(),
                     session.created_at.isoformat(),
                     session.completed_at.isoformat() if session.completed_at else None,
-                    json.dumps(session.config) if session.config else None,
-                    self._serialize_embedding(embedding)
+                    orjson.dumps(session.config).decode() if session.config else None,
+                    blob,
+                    dtype,
+                    hashes[i]
                 ))
-                conn.commit()
             
+            # Store in database; batches are written without per-commit fsyncs
+            with self.bulk_mode() if len(rows) > 1 else nullcontext(), self._lock, self._conn as conn:
+                cursor = conn.cursor()
+                cursor.executemany("""
+                    INSERT OR REPLACE INTO research_sessions 
+                    (id, topic, summary, sources, created_at, completed_at, config, embedding, embedding_dtype, content_sha1)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, rows)
+                previous_version = self._get_version(cursor)
+                self._bump_version(cursor)
+            
+            # A replaced row that lost its embedding must leave the cached matrix
+            unembedded_ids = {s.id for s in sessions} - {sessions[i].id for i in embedded}
+            with self._lock:
+                if self._embeddings is not None and not unembedded_ids.isdisjoint(self._embeddings[1]):
+                    self._embeddings = None
+            
+            self._append_embeddings(
+                previous_version,
+                [sessions[i].id for i in embedded],
+                np.array([vectors[hashes[i]] for i in embedded], dtype=np.float32)
+            )
             return True
             
         except Exception as e:
@@ -104,7 +558,7 @@ class VectorStore:
     def get_session(self, session_id: str) -> Optional[ResearchSession]:
         """Retrieve a specific research session by ID."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self._conn as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT id, topic, summary, sources, created_at, completed_at, config
@@ -114,15 +568,7 @@ class VectorStore:
                 
                 row = cursor.fetchone()
                 if row:
-                    return ResearchSession(
-                        id=row[0],
-                        topic=row[1],
-                        summary=row[2],
-                        sources=json.loads(row[3]),
-                        created_at=datetime.fromisoformat(row[4]),
-                        completed_at=datetime.fromisoformat(row[5]) if row[5] else None,
-                        config=json.loads(row[6]) if row[6] else None
-                    )
+                    return self._row_to_session(row)
             
             return None
             
@@ -134,7 +580,7 @@ class VectorStore:
         """Get recent research sessions."""
         try:
             sessions = []
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self._conn as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT id, topic, summary, sources, created_at, completed_at, config
@@ -144,15 +590,7 @@ class VectorStore:
                 """, (limit,))
                 
                 for row in cursor.fetchall():
-                    sessions.append(ResearchSession(
-                        id=row[0],
-                        topic=row[1],
-                        summary=row[2],
-                        sources=json.loads(row[3]),
-                        created_at=datetime.fromisoformat(row[4]),
-                        completed_at=datetime.fromisoformat(row[5]) if row[5] else None,
-                        config=json.loads(row[6]) if row[6] else None
-                    ))
+                    sessions.append(self._row_to_session(row))
             
             return sessions
             
@@ -160,62 +598,107 @@ class VectorStore:
             print(f"Error retrieving recent sessions: {e}")
             return []
     
-    def search_similar(self, query: str, limit: int = 5, threshold: float = 0.3) -> List[Tuple[ResearchSession, float]]:
-        """Search for similar research sessions using vector similarity."""
+    def get_recent_sessions_preview(self, limit: int = 10) -> List[SessionPreview]:
+        """Get recent sessions with only a summary prefix and a source count."""
         try:
-            # Generate embedding for query
-            model = self._get_model()
-            query_embedding = model.encode(query, convert_to_numpy=True)
-            
-            # Get all sessions with embeddings
-            results = []
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self._conn as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
-                    SELECT id, topic, summary, sources, created_at, completed_at, config, embedding
+                    SELECT id, topic, substr(summary, 1, ?), json_array_length(sources), created_at
                     FROM research_sessions 
-                    WHERE embedding IS NOT NULL
-                    ORDER BY created_at DESC
-                """)
+                    ORDER BY created_at DESC 
+                    LIMIT ?
+                """, (PREVIEW_SUMMARY_CHARS + 3, limit))
                 
-                for row in cursor.fetchall():
-                    # Deserialize embedding
-                    session_embedding = self._deserialize_embedding(row[7])
-                    
-                    # Calculate similarity
-                    similarity = cosine_similarity(
-                        query_embedding.reshape(1, -1),
-                        session_embedding.reshape(1, -1)
-                    )[0][0]
-                    
-                    if similarity >= threshold:
-                        session = ResearchSession(
-                            id=row[0],
-                            topic=row[1],
-                            summary=row[2],
-                            sources=json.loads(row[3]),
-                            created_at=datetime.fromisoformat(row[4]),
-                            completed_at=datetime.fromisoformat(row[5]) if row[5] else None,
-                            config=json.loads(row[6]) if row[6] else None
-                        )
-                        results.append((session, similarity))
+                return [
+                    SessionPreview(
+                        id=row[0],
+                        topic=row[1],
+                        summary_preview=row[2],
+                        source_count=row[3] or 0,
+                        created_at=datetime.fromisoformat(row[4])
+                    )
+                    for row in cursor.fetchall()
+                ]
+            
+        except Exception as e:
+            print(f"Error retrieving recent session previews: {e}")
+            return []
+    
+    def search_similar(self, query: str, limit: int = 5, threshold: float = 0.3) -> List[Tuple[ResearchSession, float]]:
+        """Search for similar research sessions using vector similarity."""
+        try:
+            # Normalized embedding for query, reused for repeated queries
+            query_embedding = self._embed_query(query)
+            
+            shortlist = max(RERANK_SHORTLIST_MIN, limit * BINARY_RERANK_FACTOR)
+            
+            # Snapshot the matrix and probe the index under the lock, so appends and
+            # rebuilds from the persistence thread never interleave with them;
+            # appends replace the arrays rather than mutating them, so scoring below is safe
+            with self._lock:
+                ids, matrix, codes = self._load_embeddings()
+                if not ids:
+                    return []
+                
+                # Candidate rows: hits from the probed IVF partitions plus the tail
+                # (delta partition) added since the index was built,
+                # or every row when the collection is small enough to scan exactly
+                index, tail_rows = self._get_index(ids, matrix)
+                if index is not None:
+                    row_of = {session_id: i for i, session_id in enumerate(ids)}
+                    _, hits = index.search(query_embedding.reshape(1, -1), shortlist)
+                    candidates = {row_of[self._index_ids[i]] for i in hits[0] if i != -1 and self._index_ids[i] in row_of}
+                    candidates.update(tail_rows)
+                    rows = np.fromiter(candidates, dtype=np.int64)
+                else:
+                    rows = np.arange(len(ids))
             
-            # Sort by similarity and return top results
-            results.sort(key=lambda x: x[1], reverse=True)
-            return results[:limit]
+            # Shortlist large scans by Hamming distance before exact reranking
+            if len(rows) > max(BINARY_PREFILTER_MIN, shortlist):
+                query_code = np.packbits(query_embedding > 0)
+                distances = _POPCOUNT[np.bitwise_xor(codes[rows], query_code)].sum(axis=1)
+                rows = rows[np.argpartition(distances, shortlist)[:shortlist]]
+            
+            # Score candidates with one matrix-vector product and select the top-k
+            # by partial sort; rows are unit length so the dot product is the cosine
+            scores = matrix[rows] @ query_embedding
+            k = min(limit, len(scores))
+            best = np.argpartition(-scores, k - 1)[:k]
+            best = best[np.argsort(-scores[best])]
+            top = [(float(scores[i]), ids[rows[i]]) for i in best if scores[i] >= threshold]
+            
+            sessions = self._get_sessions([session_id for _, session_id in top])
+            return [(sessions[session_id], score) for score, session_id in top if session_id in sessions]
             
         except Exception as e:
             print(f"Error searching similar sessions: {e}")
             return []
     
+    def _get_sessions(self, session_ids: List[str]) -> Dict[str, ResearchSession]:
+        """Fetch several sessions by ID in a single query."""
+        if not session_ids:
+            return {}
+        
+        placeholders = ",".join("?" * len(session_ids))
+        with self._lock, self._conn as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT id, topic, summary, sources, created_at, completed_at, config
+                FROM research_sessions 
+                WHERE id IN ({placeholders})
+            """, session_ids)
+            return {row[0]: self._row_to_session(row) for row in cursor.fetchall()}
+    
     def delete_session(self, session_id: str) -> bool:
         """Delete a research session."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self._conn as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM research_sessions WHERE id = ?", (session_id,))
-                conn.commit()
-                return cursor.rowcount > 0
+                deleted = cursor.rowcount
+                self._bump_version(cursor)
+                return deleted > 0
                 
         except Exception as e:
             print(f"Error deleting session: {e}")
@@ -224,23 +707,18 @@ class VectorStore:
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector store."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self._conn as conn:
                 cursor = conn.cursor()
                 
-                # Total sessions
-                cursor.execute("SELECT COUNT(*) FROM research_sessions")
-                total_sessions = cursor.fetchone()[0]
-                
-                # Sessions with embeddings
-                cursor.execute("SELECT COUNT(*) FROM research_sessions WHERE embedding IS NOT NULL")
-                sessions_with_embeddings = cursor.fetchone()[0]
-                
-                # Recent activity (last 7 days)
+                # Totals, embedded and recent (last 7 days) sessions in one pass
                 cursor.execute("""
-                    SELECT COUNT(*) FROM research_sessions 
-                    WHERE created_at >= datetime('now', '-7 days')
+                    SELECT 
+                        COUNT(*),
+                        COALESCE(SUM(embedding IS NOT NULL), 0),
+                        COALESCE(SUM(created_at >= datetime('now', '-7 days')), 0)
+                    FROM research_sessions
                 """)
-                recent_sessions = cursor.fetchone()[0]
+                total_sessions, sessions_with_embeddings, recent_sessions = cursor.fetchone()
                 
                 return {
                     "total_sessions": total_sessions,
@@ -257,36 +735,33 @@ class VectorStore:
     def cleanup_old_sessions(self, keep_recent: int = 100) -> int:
         """Clean up old sessions, keeping only the most recent ones."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.bulk_mode(), self._conn as conn:
                 cursor = conn.cursor()
                 
-                # Get count before cleanup
-                cursor.execute("SELECT COUNT(*) FROM research_sessions")
-                before_count = cursor.fetchone()[0]
-                
-                # Delete old sessions
-                cursor.execute("""
-                    DELETE FROM research_sessions 
-                    WHERE id NOT IN (
-                        SELECT id FROM research_sessions 
-                        ORDER BY created_at DESC 
-                        LIMIT ?
-                    )
-                """, (keep_recent,))
-                
-                conn.commit()
-                
-                # Get count after cleanup
-                cursor.execute("SELECT COUNT(*) FROM research_sessions")
-                after_count = cursor.fetchone()[0]
+                if keep_recent <= 0:
+                    cursor.execute("DELETE FROM research_sessions")
+                else:
+                    # Delete everything ordered before the oldest kept session, with id
+                    # breaking created_at ties; both steps walk idx_created_at_id
+                    cursor.execute("""
+                        DELETE FROM research_sessions 
+                        WHERE (created_at, id) < (
+                            SELECT created_at, id FROM research_sessions 
+                            ORDER BY created_at DESC, id DESC 
+                            LIMIT 1 OFFSET ?
+                        )
+                    """, (keep_recent - 1,))
+                deleted = cursor.rowcount
+                if deleted > 0:
+                    self._bump_version(cursor)
                 
-                return before_count - after_count
+                return deleted
                 
         except Exception as e:
             print(f"Error cleaning up sessions: {e}")
             return 0
 
-def create_vector_store(config: ResearchConfig) -> VectorStore:
+def create_vector_store(config: ResearchConfig, db_path: str = "research_history.db") -> VectorStore:
     """Create a vector store instance."""
-    return VectorStore(config)
+    return VectorStore(config, db_path)
 
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Behaviour tests for the exact-match and semantic LLM response caches and the structured output fallback.
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import traceback
+sys.path.insert(0, '.')
+
+import numpy as np
+from langchain_core.messages import AIMessage, HumanMessage
+
+from config.settings import ResearchConfig
+from research.state import QueryOutput
+import research.llm_providers as llm_providers_module
+from research.llm_providers import LLMProvider, CachedLLMProvider
+
+# Unit vectors for the semantic cache's texts: "topic" and "topic, reworded" have
+# cosine 0.9, "unrelated" is orthogonal to both
+_BASIS = np.eye(8, dtype=np.float32)
+EMBEDDINGS = {
+    "topic": _BASIS[0],
+    "topic, reworded": 0.9 * _BASIS[0] + np.sqrt(1 - 0.81, dtype=np.float32) * _BASIS[1],
+    "unrelated": _BASIS[2],
+}
+
+class FakeProvider(LLMProvider):
+    """Provider answering every prompt with a numbered reply and counting the calls."""
+    
+    def __init__(self, config: ResearchConfig):
+        super().__init__(config)
+        self.calls = 0
+    
+    def invoke(self, messages, json_mode: bool = False, structured_output=None, **kwargs):
+        """Answer with the next numbered reply, or a QueryOutput-shaped model."""
+        self.calls += 1
+        if structured_output is not None:
+            return structured_output(query=f"query {self.calls}", rationale="because")
+        return AIMessage(content=f"reply {self.calls}")
+    
+    def invoke_stream(self, messages):
+        """Stream the next numbered reply in two chunks."""
+        self.calls += 1
+        yield "streamed "
+        yield f"reply {self.calls}"
+
+def open_cache(db_path: str) -> CachedLLMProvider:
+    """Wrap a fresh fake provider in the response cache, embedding texts from EMBEDDINGS."""
+    cached = CachedLLMProvider(FakeProvider(ResearchConfig()), db_path)
+    cached.semantic_cache._embed = EMBEDDINGS.__getitem__
+    return cached
+
+def age_entries(db_path: str, seconds: int):
+    """Move every cached entry the given number of seconds into the past."""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE llm_cache SET created_at = created_at - ?", (seconds,))
+        conn.execute("UPDATE llm_semantic_cache SET created_at = created_at - ?", (seconds,))
+        conn.commit()
+
+def prompt(text: str):
+    """Build a single-message prompt."""
+    return [HumanMessage(content=text)]
+
+def test_exact_cache_hit_miss_and_expiry():
+    """Repeated prompts are answered from disk until the entry expires."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "llm_cache.db")
+        cached = open_cache(db_path)
+        
+        assert cached.invoke(prompt("hello")).content == "reply 1"
+        assert cached.invoke(prompt("hello")).content == "reply 1"
+        assert cached.provider.calls == 1
+        
+        # Different messages or output mode miss
+        assert cached.invoke(prompt("hello again")).content == "reply 2"
+        assert cached.invoke(prompt("hello"), json_mode=True).content == "reply 3"
+        
+        # Structured outputs are cached as JSON and revalidated
+        first = cached.invoke(prompt("hello"), structured_output=QueryOutput)
+        assert cached.invoke(prompt("hello"), structured_output=QueryOutput) == first
+        assert isinstance(first, QueryOutput) and cached.provider.calls == 4
+        
+        # Streams are replayed as one chunk
+        assert "".join(cached.invoke_stream(prompt("stream"))) == "streamed reply 5"
+        assert list(cached.invoke_stream(prompt("stream"))) == ["streamed reply 5"]
+        
+        # Entries persist across providers until the TTL passes
+        reopened = open_cache(db_path)
+        assert reopened.invoke(prompt("hello")).content == "reply 1"
+        assert reopened.provider.calls == 0
+        age_entries(db_path, cached.ttl + 1)
+        reopened.invoke(prompt("hello"))
+        assert reopened.provider.calls == 1
+
+def test_exact_cache_prunes_expired_and_surplus_rows():
+    """Writes delete expired entries and keep at most LLM_CACHE_MAX_ROWS."""
+    max_rows = llm_providers_module.LLM_CACHE_MAX_ROWS
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "llm_cache.db")
+        cached = open_cache(db_path)
+        try:
+            cached.invoke(prompt("old"))
+            age_entries(db_path, cached.ttl + 1)
+            llm_providers_module.LLM_CACHE_MAX_ROWS = 3
+            for i in range(5):
+                cached.invoke(prompt(f"new {i}"))
+        finally:
+            llm_providers_module.LLM_CACHE_MAX_ROWS = max_rows
+        
+        with sqlite3.connect(db_path) as conn:
+            contents = {row[0] for row in conn.execute("SELECT content FROM llm_cache")}
+        assert len(contents) == 3
+        assert "reply 1" not in contents
+
+def test_semantic_cache_threshold_run_isolation_and_expiry():
+    """Similar texts from other runs hit at or above the threshold, never the run's own entries."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "llm_cache.db")
+        first_run = open_cache(db_path)
+        first_run.invoke(prompt("first wording"), semantic_scope="query", semantic_text="topic")
+        
+        # The run that stored an entry is never served it for a different prompt
+        first_run.invoke(prompt("second wording"), semantic_scope="query", semantic_text="topic")
+        assert first_run.provider.calls == 2
+        
+        # Another run gets a similar entry at or above the threshold (cosine 0.9 here)
+        second_run = open_cache(db_path)
+        reply = second_run.invoke(prompt("third wording"), semantic_scope="query", semantic_text="topic, reworded")
+        assert reply.content in ("reply 1", "reply 2") and second_run.provider.calls == 0
+        
+        # A stricter per-call threshold, another scope or an unrelated text miss
+        second_run.invoke(prompt("fourth wording"), semantic_scope="query", semantic_text="topic, reworded",
+                          semantic_threshold=0.95)
+        second_run.invoke(prompt("fifth wording"), semantic_scope="other", semantic_text="topic")
+        second_run.invoke(prompt("sixth wording"), semantic_scope="query", semantic_text="unrelated")
+        assert second_run.provider.calls == 3
+        
+        # Expired entries no longer match
+        age_entries(db_path, first_run.ttl + 1)
+        third_run = open_cache(db_path)
+        third_run.invoke(prompt("seventh wording"), semantic_scope="query", semantic_text="topic")
+        assert third_run.provider.calls == 1
+
+class SchemaRejected(Exception):
+    """Error a fake server raises for structured output requests."""
+
+class FakeChatModel:
+    """Chat model that rejects schema-constrained requests and answers JSON mode with a fixed reply."""
+    
+    def __init__(self, json_reply: str):
+        self.json_reply = json_reply
+    
+    def with_structured_output(self, schema, method=None):
+        """Return the same model; the schema request is rejected on invoke."""
+        return self
+    
+    def invoke(self, messages):
+        """Reply with the JSON text, or reject the schema request."""
+        if self.json_reply is None:
+            raise SchemaRejected("response_format is not supported")
+        return AIMessage(content=self.json_reply)
+
+class SchemaRejectingProvider(LLMProvider):
+    """Provider whose server rejects structured output but supports JSON mode."""
+    
+    def __init__(self, config: ResearchConfig, error: type = SchemaRejected):
+        super().__init__(config)
+        self.error = error
+    
+    def get_llm(self, json_mode: bool = False):
+        """Get a chat model that only answers in JSON mode."""
+        return FakeChatModel('{"query": "fallback query", "rationale": "json mode"}' if json_mode else None)
+    
+    def structured_output_errors(self) -> tuple:
+        """Exception types treated as a rejected schema request."""
+        return (self.error,)
+
+def test_structured_output_falls_back_to_json_mode():
+    """A rejected schema request is retried in JSON mode and validated locally."""
+    result = SchemaRejectingProvider(ResearchConfig()).invoke(prompt("q"), structured_output=QueryOutput)
+    assert result == QueryOutput(query="fallback query", rationale="json mode")
+    
+    # Errors the provider does not list are not treated as a missing feature
+    provider = SchemaRejectingProvider(ResearchConfig(), error=KeyError)
+    try:
+        provider.invoke(prompt("q"), structured_output=QueryOutput)
+    except SchemaRejected:
+        pass
+    else:
+        raise AssertionError("unexpected fallback")
+
+TESTS = [
+    test_exact_cache_hit_miss_and_expiry,
+    test_exact_cache_prunes_expired_and_surplus_rows,
+    test_semantic_cache_threshold_run_isolation_and_expiry,
+    test_structured_output_falls_back_to_json_mode,
+]
+
+def run_tests(tests) -> bool:
+    """Run test functions, printing a line per test; return whether all passed."""
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception:
+            failed += 1
+            print(f"❌ {test.__name__}")
+            traceback.print_exc()
+    
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+if __name__ == "__main__":
+    success = run_tests(TESTS)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Behaviour tests for the research state reducers, source deduplication, prompt templates and checkpoint resume.
+"""
+
+import sys
+import os
+import tempfile
+import traceback
+sys.path.insert(0, '.')
+
+from langchain_core.messages import AIMessage
+
+from config.settings import ResearchConfig
+from research.state import ResearchState, QueryOutput, ReflectionOutput, _keep_last
+from research.prompts import (
+    _compile_template, query_writer_input, render_query_writer_input, reflection_input, render_reflection_input
+)
+import research.graph as graph_module
+from research.llm_providers import LLMProvider
+
+SHARED_URL = "https://example.com/shared"
+
+class ScriptedProvider(LLMProvider):
+    """Provider with fixed structured replies whose summary stream can be made to fail once."""
+    
+    def __init__(self, config: ResearchConfig, fail_on_stream: int = 0):
+        super().__init__(config)
+        self.calls = []
+        self.fail_on_stream = fail_on_stream
+    
+    def invoke(self, messages, structured_output=None, **kwargs):
+        """Return the initial query or a numbered follow-up query."""
+        if structured_output is QueryOutput:
+            self.calls.append("query")
+            return QueryOutput(query="first query", rationale="start")
+        if structured_output is ReflectionOutput:
+            self.calls.append("reflect")
+            return ReflectionOutput(follow_up_query=f"follow up {len(self.calls)}", knowledge_gap="gap")
+        return AIMessage(content="")
+    
+    def invoke_stream(self, messages):
+        """Stream a short summary, failing on the configured summary call."""
+        self.calls.append("summarize")
+        if self.calls.count("summarize") == self.fail_on_stream:
+            self.fail_on_stream = 0
+            raise RuntimeError("summary stream dropped")
+        yield "summary of "
+        yield f"{len(self.calls)} calls"
+
+def fake_search(query: str, max_results: int = 3, fetch_full_page: bool = False):
+    """Return one result per query plus one result every query shares."""
+    return {"results": [
+        {"title": query, "url": f"https://example.com/{query.replace(' ', '-')}", "content": query, "raw_content": query},
+        {"title": "shared", "url": SHARED_URL, "content": "shared", "raw_content": "shared"},
+    ]}
+
+class patched_graph:
+    """Build a research graph on a temporary checkpoint database, with a scripted LLM and search."""
+    
+    def __init__(self, provider_factory):
+        self.provider_factory = provider_factory
+    
+    def __enter__(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.saved = {name: getattr(graph_module, name) for name in
+                      ("CHECKPOINT_DB_PATH", "_checkpointer", "get_llm_provider", "duckduckgo_search")}
+        graph_module.CHECKPOINT_DB_PATH = os.path.join(self.tmp_dir.name, "checkpoints.db")
+        graph_module._checkpointer = None
+        graph_module.get_llm_provider = self.provider_factory
+        graph_module.duckduckgo_search = fake_search
+        graph_module._search_cache.clear()
+        
+        config = ResearchConfig(max_web_research_loops=1, search_api="duckduckgo", fetch_full_page=False)
+        return graph_module.create_research_graph(config)
+    
+    def __exit__(self, *exc_info):
+        if graph_module._checkpointer is not None:
+            graph_module._checkpointer.conn.close()
+        for name, value in self.saved.items():
+            setattr(graph_module, name, value)
+        graph_module._search_cache.clear()
+        self.tmp_dir.cleanup()
+
+def test_keep_last_reducer():
+    """Only the newest web research result is kept."""
+    assert _keep_last(["a"], ["b"]) == ["b"]
+    assert _keep_last(["a"], ["b", "c"]) == ["c"]
+    assert _keep_last(["a", "b"], []) == ["b"]
+    assert _keep_last([], []) == []
+
+def test_web_research_skips_known_sources():
+    """Sources already gathered are not added again."""
+    with patched_graph(lambda config: ScriptedProvider(config)) as graph:
+        state = ResearchState(research_topic="topic", search_query="next query",
+                              sources_gathered=[SHARED_URL], sources_set={SHARED_URL})
+        update = graph._web_research(state)
+        
+        assert update["sources_gathered"] == ["https://example.com/next-query"]
+        assert update["sources_set"] == {SHARED_URL, "https://example.com/next-query"}
+        assert update["research_loop_count"] == 1
+        assert len(update["web_research_results"]) == 1
+
+def test_compile_template_matches_str_format():
+    """Compiled templates render like str.format and reject what they cannot render."""
+    values = {"current_date": "January 1, 2025", "research_topic": "quantum {computing}"}
+    assert render_query_writer_input(**values) == query_writer_input.format(**values)
+    values = {"research_topic": None, "running_summary": 42}
+    assert render_reflection_input(**values) == reflection_input.format(**values)
+    assert _compile_template("{{literal}} {field}")(field="value") == "{literal} value"
+    
+    for template in ("{field!r}", "{field:>10}"):
+        try:
+            _compile_template(template)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"accepted {template}")
+
+def test_run_resumes_from_checkpoint():
+    """A failed run resumes after its last completed node, with the reducers applied to the saved state."""
+    provider = ScriptedProvider(ResearchConfig(), fail_on_stream=2)
+    with patched_graph(lambda config: provider) as graph:
+        run_config = {"configurable": {"thread_id": "attempt-1"}}
+        try:
+            graph.run_research("topic", thread_id="attempt-1")
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("first attempt should fail")
+        assert provider.calls == ["query", "summarize", "reflect", "summarize"]
+        
+        # Two searches were merged into the checkpoint: every new source once, only the latest results
+        values = graph.graph.get_state(run_config).values
+        follow_up_url = "https://example.com/follow-up-3"
+        assert values["sources_gathered"] == ["https://example.com/first-query", SHARED_URL, follow_up_url]
+        assert values["sources_set"] == set(values["sources_gathered"])
+        assert len(values["web_research_results"]) == 1
+        assert follow_up_url in values["web_research_results"][0]
+        
+        # Resuming reruns only the failed summary and what follows it
+        provider.calls.clear()
+        state = graph.run_research("topic", thread_id="attempt-1")
+        assert provider.calls == ["summarize", "reflect"]
+        assert state.current_step == "completed"
+        assert state.running_summary.count(SHARED_URL) == 1
+        
+        # Completed runs leave no checkpoints, and a new thread starts from scratch
+        assert not graph.graph.get_state(run_config).values
+        provider.calls.clear()
+        graph.run_research("topic")
+        assert provider.calls[0] == "query"
+
+TESTS = [
+    test_keep_last_reducer,
+    test_web_research_skips_known_sources,
+    test_compile_template_matches_str_format,
+    test_run_resumes_from_checkpoint,
+]
+
+def run_tests(tests) -> bool:
+    """Run test functions, printing a line per test; return whether all passed."""
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception:
+            failed += 1
+            print(f"❌ {test.__name__}")
+            traceback.print_exc()
+    
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+if __name__ == "__main__":
+    success = run_tests(TESTS)
+    sys.exit(0 if success else 1)
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Behaviour tests for the vector store's embedding storage, sidecar, ANN index and cleanup.
+"""
+
+import sys
+import os
+import hashlib
+import tempfile
+import traceback
+sys.path.insert(0, '.')
+
+import numpy as np
+from datetime import datetime, timedelta
+
+from config.settings import ResearchConfig
+from research.state import ResearchSession
+import storage.vector_store as vector_store_module
+from storage.vector_store import VectorStore
+
+DIMENSION = 384
+
+class FakeEncoder:
+    """Deterministic stand-in for a sentence-transformers model: one random unit vector per text."""
+    
+    def encode(self, texts, normalize_embeddings=False, **kwargs):
+        single = isinstance(texts, str)
+        rows = []
+        for text in [texts] if single else texts:
+            seed = int(hashlib.sha1(text.encode()).hexdigest()[:8], 16)
+            vector = np.random.default_rng(seed).standard_normal(DIMENSION).astype(np.float32)
+            rows.append(vector / np.linalg.norm(vector) if normalize_embeddings else vector)
+        return rows[0] if single else np.vstack(rows)
+
+class ClusteredEncoder:
+    """Stand-in encoder whose texts "cluster <c> ..." embed near a shared per-cluster centroid."""
+    
+    def encode(self, texts, normalize_embeddings=False, **kwargs):
+        single = isinstance(texts, str)
+        rows = []
+        for text in [texts] if single else texts:
+            centroid = np.random.default_rng(int(text.split()[1])).standard_normal(DIMENSION)
+            seed = int(hashlib.sha1(text.encode()).hexdigest()[:8], 16)
+            vector = (centroid + np.random.default_rng(seed).standard_normal(DIMENSION)).astype(np.float32)
+            rows.append(vector / np.linalg.norm(vector) if normalize_embeddings else vector)
+        return rows[0] if single else np.vstack(rows)
+
+def make_session(i: int, created_at: datetime = None) -> ResearchSession:
+    """Build a session whose text is long enough to be embedded."""
+    return ResearchSession(
+        id=f"session-{i}",
+        topic=f"Research topic number {i}",
+        summary=f"A summary long enough to be embedded for session {i}.",
+        sources=[],
+        created_at=created_at or datetime(2025, 1, 1) + timedelta(minutes=i)
+    )
+
+def session_text(i: int) -> str:
+    """The text add_sessions embeds for make_session(i)."""
+    session = make_session(i)
+    return f"{session.topic}\n\n{session.summary}"
+
+def open_store(db_path: str) -> VectorStore:
+    """Open a store on db_path with the fake encoder."""
+    return VectorStore(ResearchConfig(), db_path, encoder=FakeEncoder())
+
+def test_int8_round_trip():
+    """Quantized embeddings deserialize to within half a quantization step."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = open_store(os.path.join(tmp_dir, "history.db"))
+        vector = FakeEncoder().encode("round trip", normalize_embeddings=True)
+        
+        blob = store._serialize_embedding(vector)
+        restored = store._deserialize_embedding(blob, vector_store_module.EMBEDDING_DTYPE)
+        
+        assert len(blob) == 4 + DIMENSION
+        assert restored.dtype == np.float32
+        scale = np.abs(vector).max() / 127.0
+        assert np.abs(restored - vector).max() <= scale / 2 + 1e-6
+        assert float(restored @ vector) / np.linalg.norm(restored) > 0.999
+        
+        # Legacy float32 rows are read back unchanged
+        assert np.array_equal(store._deserialize_embedding(vector.tobytes()), vector)
+        store.close()
+
+def test_sidecar_append_survives_reload():
+    """Rows appended to an existing sidecar memory-map back with the right shape, dtype and results."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "history.db")
+        store = open_store(db_path)
+        store.add_sessions([make_session(i) for i in range(3)])
+        assert store.search_similar(session_text(0), limit=1)[0][0].id == "session-0"
+        
+        # The sidecar now exists, so these rows are appended to it in place
+        store.add_sessions([make_session(i) for i in range(3, 5)])
+        ids, matrix, _ = store._load_embeddings()
+        results = [(s.id, score) for s, score in store.search_similar(session_text(4), limit=3, threshold=-1.0)]
+        store.close()
+        
+        sidecar = np.load(store.vectors_path, mmap_mode="r")
+        assert sidecar.shape == (5, DIMENSION)
+        assert sidecar.dtype == np.float32
+        assert np.array_equal(np.asarray(sidecar), matrix)
+        assert ids == [f"session-{i}" for i in range(5)]
+        del sidecar
+        
+        # A fresh store warm-starts from the sidecar instead of SQLite and ranks the same way
+        reopened = open_store(db_path)
+        reopened_ids, reopened_matrix, _ = reopened._load_embeddings()
+        assert isinstance(reopened_matrix, np.memmap)
+        assert reopened_ids == ids
+        reopened_results = [(s.id, score) for s, score in reopened.search_similar(session_text(4), limit=3, threshold=-1.0)]
+        assert [session_id for session_id, _ in reopened_results] == [session_id for session_id, _ in results]
+        assert np.allclose([score for _, score in reopened_results], [score for _, score in results])
+        assert reopened_results[0][0] == "session-4"
+        del reopened_matrix
+        reopened.close()
+
+def clustered_session(i: int) -> ResearchSession:
+    """Build a session in one of eight clusters of similar topics."""
+    return ResearchSession(
+        id=f"session-{i}",
+        topic=f"cluster {i % 8} research topic {i}",
+        summary="A summary long enough to be embedded.",
+        sources=[],
+        created_at=datetime(2025, 1, 1) + timedelta(minutes=i)
+    )
+
+def assert_matches_exact_scan(store: VectorStore, limit: int = 10, threshold: float = 0.3):
+    """Check that search_similar returns the top results of a full float scan."""
+    ids, matrix, _ = store._load_embeddings()
+    for cluster in (0, 3, 7):
+        query = f"cluster {cluster} query about the research topic"
+        scores = matrix @ ClusteredEncoder().encode(query, normalize_embeddings=True)
+        exact = [ids[i] for i in np.argsort(-scores)[:limit] if scores[i] >= threshold]
+        assert len(exact) == limit
+        found = [s.id for s, _ in store.search_similar(query, limit=limit, threshold=threshold)]
+        assert found == exact, (cluster, found, exact)
+
+def test_binary_prefilter_matches_exact_scan():
+    """Scans below ANN_MIN_SESSIONS are exact, and prefiltered larger scans keep the true top results."""
+    ann_min_sessions = vector_store_module.ANN_MIN_SESSIONS
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = VectorStore(ResearchConfig(), os.path.join(tmp_dir, "history.db"), encoder=ClusteredEncoder())
+        try:
+            below = ann_min_sessions - 1
+            store.add_sessions([clustered_session(i) for i in range(below)])
+            assert_matches_exact_scan(store)
+            
+            # Without an ANN index, a scan past BINARY_PREFILTER_MIN is shortlisted by Hamming distance
+            vector_store_module.ANN_MIN_SESSIONS = 10 ** 9
+            above = vector_store_module.BINARY_PREFILTER_MIN + 300
+            store.add_sessions([clustered_session(i) for i in range(below, above)])
+            assert len(store._load_embeddings()[0]) == above
+            assert_matches_exact_scan(store)
+        finally:
+            vector_store_module.ANN_MIN_SESSIONS = ann_min_sessions
+            store.close()
+
+def test_ann_index_grows_and_rebuilds():
+    """The IVF index is built at ANN_MIN_SESSIONS, extended in place, then retrained after growth."""
+    import faiss
+    
+    retrain_growth = vector_store_module.ANN_RETRAIN_GROWTH
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "history.db")
+        store = open_store(db_path)
+        try:
+            initial = vector_store_module.ANN_MIN_SESSIONS
+            store.add_sessions([make_session(i) for i in range(initial)])
+            assert store.search_similar(session_text(7), limit=1)[0][0].id == "session-7"
+            assert store._index is not None
+            assert store._index_trained_size == initial
+            
+            # New sessions are added to the trained index without retraining it
+            store.add_sessions([make_session(i) for i in range(initial, initial + 20)])
+            assert store._index.ntotal == len(store._index_ids) == initial + 20
+            assert store._index_trained_size == initial
+            assert store.search_similar(session_text(initial + 5), limit=1)[0][0].id == f"session-{initial + 5}"
+            
+            # Index saves are batched, so a store opened after a crash loads the saved
+            # index and scans the sessions added since as unindexed rows
+            assert faiss.read_index(store.index_path).ntotal == initial
+            recovered = open_store(db_path)
+            assert recovered.search_similar(session_text(initial + 5), limit=1)[0][0].id == f"session-{initial + 5}"
+            assert recovered._index.ntotal == initial
+            recovered.close()
+            
+            # Past the growth limit the next search retrains on the whole collection
+            vector_store_module.ANN_RETRAIN_GROWTH = 1.01
+            assert store.search_similar(session_text(initial + 10), limit=1)[0][0].id == f"session-{initial + 10}"
+            assert store._index_trained_size == initial + 20
+            assert store._index.ntotal == initial + 20
+            
+            # Closing the store saves additions that have not been written yet
+            store.add_sessions([make_session(i) for i in range(initial + 20, initial + 25)])
+        finally:
+            vector_store_module.ANN_RETRAIN_GROWTH = retrain_growth
+            store.close()
+        assert faiss.read_index(store.index_path).ntotal == initial + 25
+
+def test_cleanup_keeps_most_recent():
+    """Cleanup keeps exactly keep_recent sessions, even when their timestamps tie."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = open_store(os.path.join(tmp_dir, "history.db"))
+        tied = datetime(2025, 1, 1)
+        store.add_sessions([make_session(i, created_at=tied) for i in range(6)])
+        store.add_sessions([make_session(i) for i in range(6, 8)])
+        
+        assert store.cleanup_old_sessions(keep_recent=3) == 5
+        assert store.get_stats()["total_sessions"] == 3
+        assert [s.id for s in store.get_recent_sessions(10)][:2] == ["session-7", "session-6"]
+        # Cleanup invalidates the cached matrix, so searches only see the kept sessions
+        assert len(store._load_embeddings()[0]) == 3
+        
+        assert store.cleanup_old_sessions(keep_recent=3) == 0
+        assert store.cleanup_old_sessions(keep_recent=0) == 3
+        assert store.get_stats()["total_sessions"] == 0
+        assert store.search_similar(session_text(7)) == []
+        store.close()
+
+TESTS = [
+    test_int8_round_trip,
+    test_sidecar_append_survives_reload,
+    test_binary_prefilter_matches_exact_scan,
+    test_ann_index_grows_and_rebuilds,
+    test_cleanup_keeps_most_recent,
+]
+
+def run_tests(tests) -> bool:
+    """Run test functions, printing a line per test; return whether all passed."""
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception:
+            failed += 1
+            print(f"❌ {test.__name__}")
+            traceback.print_exc()
+    
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    return failed == 0
+
+if __name__ == "__main__":
+    success = run_tests(TESTS)
+    sys.exit(0 if success else 1)